@@ -0,0 +1,128 @@
+"""Benchmark of the scrapper Song/Artist records.
+
+Compares the previous plain dataclasses (serialized with dataclasses.asdict) with the
+current slotted ones: memory used by 100k songs and serialization throughput.
+
+Run from the tab_processor directory:
+    python benchmarks/data_benchmark.py
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict, field
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "scrapper"))
+
+import utils.files as files  # noqa: E402
+from utils.data import Song, Artist  # noqa: E402
+
+N_SONGS = 100_000
+SONGS_PER_ARTIST = 50
+
+
+# --- Previous implementation (plain dataclasses + asdict) ---
+@dataclass
+class LegacySong:
+    id: int = field(init=False)
+    song_title: str
+    song_url: str
+    genre: str = ""
+    lyrics_path: str = None
+
+    _id_counter = 1
+
+    def __post_init__(self):
+        self.id = LegacySong._id_counter
+        LegacySong._id_counter += 1
+
+        self.lyrics_path = files.normalize_relative_path(self.lyrics_path)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(data):
+        data_copy = data.copy()
+        data_copy.pop("id", None)
+        return LegacySong(**data_copy)
+
+
+@dataclass
+class LegacyArtist:
+    id: int = field(init=False)
+    name: str
+    url: str
+    genres: list[str] = field(default_factory=list)
+    albums: list[str] = field(default_factory=list)
+    songs: list[LegacySong] = field(default_factory=list)
+
+    _id_counter = 1
+
+    def __post_init__(self):
+        self.id = LegacyArtist._id_counter
+        LegacyArtist._id_counter += 1
+
+    def to_dict(self):
+        data = asdict(self)
+        data["songs"] = [song.to_dict() for song in self.songs]
+        return data
+
+    @staticmethod
+    def from_dict(data):
+        data_copy = data.copy()
+        data_copy.pop("id", None)
+        songs_data = data_copy.pop("songs", [])
+        artist = LegacyArtist(**data_copy)
+        artist.songs = [LegacySong.from_dict(s_data) for s_data in songs_data]
+        return artist
+
+
+def build(song_cls, artist_cls):
+    artists = []
+    for a in range(N_SONGS // SONGS_PER_ARTIST):
+        artist = artist_cls(
+            name=f"Artist {a}", url=f"https://acordes.lacuerda.net/artist_{a}"
+        )
+        for s in range(SONGS_PER_ARTIST):
+            artist.songs.append(
+                song_cls(
+                    song_title=f"Song {s}",
+                    song_url=f"https://acordes.lacuerda.net/artist_{a}/song_{s}.shtml",
+                    lyrics_path=f"./files/songs/artist_{a}/song_{s}.txt",
+                )
+            )
+        artists.append(artist)
+    return artists
+
+
+def measure(label, song_cls, artist_cls):
+    tracemalloc.start()
+    artists = build(song_cls, artist_cls)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    lines = [json.dumps(artist.to_dict(), ensure_ascii=False) for artist in artists]
+    serialize = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for line in lines:
+        artist_cls.from_dict(json.loads(line))
+    deserialize = time.perf_counter() - start
+
+    print(f"{label}")
+    print(f"  memory per {N_SONGS} songs: {memory / (1024 * 1024):.1f} MB")
+    print(f"  serialization: {N_SONGS / serialize:,.0f} songs/s")
+    print(f"  deserialization: {N_SONGS / deserialize:,.0f} songs/s")
+
+
+def main():
+    measure("Before (dataclass + asdict)", LegacySong, LegacyArtist)
+    measure("After (slots + direct to_dict)", Song, Artist)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark of the file discovery used by the pipeline stages.
+
+Builds a tree like files/songs (one directory per artist, .txt tabs plus a few other
+files) and compares the previous ways of listing it (os.listdir + os.path.isdir as in
+the cleaner, os.walk as in the validator and lyrics stages) with common.discovery.
+
+Run from the tab_processor directory:
+    python benchmarks/discovery_benchmark.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.discovery import iter_files  # noqa: E402
+
+N_ARTISTS = 2_000
+SONGS_PER_ARTIST = 50
+REPEATS = 3
+
+
+# --- Previous implementations ---
+def legacy_listdir(path, found=None):
+    found = [] if found is None else found
+    for entry in os.listdir(path):
+        full_path = os.path.join(path, entry)
+        if os.path.isdir(full_path):
+            legacy_listdir(full_path, found)
+        elif full_path.lower().endswith(".txt"):
+            found.append(full_path)
+    return found
+
+
+def legacy_walk(path):
+    found = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.lower().endswith(".txt"):
+                found.append(os.path.join(root, name))
+    return found
+
+
+def build_tree(root):
+    songs = os.path.join(root, "songs")
+    for artist in range(N_ARTISTS):
+        directory = os.path.join(songs, f"artist-{artist}")
+        os.makedirs(directory)
+        for song in range(SONGS_PER_ARTIST):
+            open(os.path.join(directory, f"song-{song}.txt"), "w").close()
+        open(os.path.join(directory, "notes.json"), "w").close()
+    return songs
+
+
+def best_time(function):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        songs = build_tree(root)
+        print(f"{N_ARTISTS * SONGS_PER_ARTIST} .txt files in {N_ARTISTS} directories\n")
+
+        candidates = {
+            "os.listdir + isdir": lambda: legacy_listdir(songs),
+            "os.walk": lambda: legacy_walk(songs),
+            "iter_files (scandir)": lambda: list(iter_files(songs, suffixes=(".txt",))),
+        }
+        for name, function in candidates.items():
+            seconds, found = best_time(function)
+            print(f"{name:<22} {seconds:.3f} s  ({found} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark of the queries of the lyrics search index.
+
+Builds an index of random lyrics (words drawn with a Zipf-like distribution, plus some
+stopwords, so a few words appear in almost every song like in real lyrics) and times
+single word, AND, OR and phrase queries, from the most common words to rare ones.
+Scanning the lyrics to answer the same queries is timed as a reference.
+
+Run from the tab_processor directory:
+    python benchmarks/indexer_benchmark.py
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+from collections import defaultdict
+from itertools import accumulate
+
+TAB_PROCESSOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TAB_PROCESSOR, "indexer"))
+sys.path.insert(0, TAB_PROCESSOR)
+
+from common.text import iter_positions  # noqa: E402
+from utils.inverted_index import InvertedIndex  # noqa: E402
+from utils.query import search  # noqa: E402
+
+N_SONGS = 10_000
+LINES_PER_SONG = 30
+VOCABULARY = 8_000
+STOPWORDS = ["el", "la", "de", "que", "y", "en", "te", "mi"]
+REPEATS = 5
+
+
+def build_lyrics(rng):
+    letters = "abcdefghijlmnopqrstuvñáé"
+    words = sorted(
+        {"".join(rng.choices(letters, k=rng.randint(3, 8))) for _ in range(VOCABULARY)}
+    )
+    cumulative = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    songs = []
+    for _ in range(N_SONGS):
+        lines = []
+        for _ in range(LINES_PER_SONG):
+            line = rng.choices(words, cum_weights=cumulative, k=5)
+            line += rng.sample(STOPWORDS, 2)
+            rng.shuffle(line)
+            lines.append(" ".join(line).capitalize() + ",")
+        songs.append("\n".join(lines))
+    return words, songs
+
+
+def build_index(path, songs):
+    index = InvertedIndex(path)
+    for number, text in enumerate(songs):
+        positions = defaultdict(list)
+        for position, word in iter_positions(text):
+            positions[word].append(position)
+        name = f"song-{number}"
+        index.replace_document(name, "artist", name, 0, 0, positions)
+    index.pack()
+    index.commit()
+    return index
+
+
+def scan(songs, words):
+    """Reference: reads every song looking for all the words."""
+    return sum(
+        all(word in found for word in words)
+        for found in ({word for _, word in iter_positions(text)} for text in songs)
+    )
+
+
+def best_time(function):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rng = random.Random(0)
+    words, songs = build_lyrics(rng)
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        index = build_index(os.path.join(root, "index.sqlite"), songs)
+        print(f"{N_SONGS} songs indexed in {time.perf_counter() - start:.1f} s\n")
+
+        # A word found in almost every song, one in a few of them and a rare one
+        frequencies = index.document_frequencies(words)
+        ranked = sorted(words, key=frequencies.get, reverse=True)
+        common, frequent, rare = ranked[0], ranked[50], ranked[2000]
+        queries = [
+            common,
+            frequent,
+            rare,
+            f"{common} {frequent}",
+            f"{frequent} OR {rare}",
+            f'"{common} {frequent}"',
+            f'{rare} "{common} {frequent}"',
+        ]
+        for query in queries:
+            seconds, (matches, _) = best_time(lambda: search(index, query, 10))
+            print(f"{query:<28} {seconds * 1000:8.2f} ms  ({matches} songs)")
+        index.close()
+
+    seconds, matches = best_time(lambda: scan(songs, [common, frequent]))
+    print(
+        f"\nScanning the lyrics for {common} {frequent}: "
+        f"{seconds * 1000:.2f} ms ({matches} songs)"
+    )
+
+
+if __name__ == "__main__":
+    main()
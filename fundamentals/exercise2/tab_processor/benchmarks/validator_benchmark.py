@@ -0,0 +1,94 @@
+"""Benchmark of the validator's song format check.
+
+Compares the previous rule, re.fullmatch(r"((?:[A-Z]+\\s+)*\\n.+)+", song, re.DOTALL),
+with tab_validator.utils.validation.SONG_PREFIX on inputs of growing size: a valid
+tab, uppercase-only blocks (the worst case for the old pattern's backtracking) and
+random texts, checking that both give the same decision every time.
+
+Run from the tab_processor directory:
+    python benchmarks/validator_benchmark.py
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "tab_validator"))
+
+from utils.validation import SONG_PREFIX  # noqa: E402
+
+LEGACY_PATTERN = re.compile(r"((?:[A-Z]+\s+)*\n.+)+", flags=re.DOTALL)
+SIZES = (1_000, 10_000, 100_000)
+RANDOM_SAMPLES = 100_000
+
+
+def legacy_check(song: str) -> bool:
+    return bool(LEGACY_PATTERN.fullmatch(song))
+
+
+def new_check(song: str) -> bool:
+    return bool(SONG_PREFIX.match(song))
+
+
+# --- Inputs, by number of lines ---
+def valid_tab(lines):
+    # Matches: a header block ending in whitespace + newline, then the song
+    return "C G \n" + "Am   G   C\nla letra de la cancion\n" * (lines // 2)
+
+
+def uppercase_block(lines):
+    # Never matches: no newline comes right after whitespace
+    return "AM G C\n" * lines
+
+
+def uppercase_block_then_text(lines):
+    # Never matches: a lowercase letter right after a long uppercase block
+    return "AM G C " * lines + "x\n"
+
+
+INPUTS = {
+    "valid tab": valid_tab,
+    "uppercase block": uppercase_block,
+    "uppercase block + text": uppercase_block_then_text,
+}
+
+
+def timed(function, song, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(song)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def random_texts():
+    alphabet = ["A", "G", "Z", "a", "x", " ", "\t", "\n", "\n", "\r", "#", "1"]
+    rng = random.Random(0)
+    for _ in range(RANDOM_SAMPLES):
+        yield "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+
+
+def main():
+    print(f"{'input':<24}{'lines':>8}{'old (ms)':>12}{'new (ms)':>12}  same")
+    for name, build in INPUTS.items():
+        for lines in SIZES:
+            song = build(lines)
+            old_seconds, old_result = timed(legacy_check, song)
+            new_seconds, new_result = timed(new_check, song)
+            print(
+                f"{name:<24}{lines:>8}{old_seconds * 1000:>12.3f}"
+                f"{new_seconds * 1000:>12.3f}  {old_result == new_result}"
+            )
+
+    mismatches = sum(legacy_check(s) != new_check(s) for s in random_texts())
+    print(f"\nRandom texts: {mismatches} different decisions in {RANDOM_SAMPLES}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Chord grammar shared by the validator and lyrics stages.
+
+A chord is a root note, an optional accidental, an optional quality and an optional
+number: A, A#, Bb, Am, Cmaj, Fmaj7, Gm7, Asus4, Bdim, Caug, E5... This covers the
+suffixes known by the validator, by the lyrics stage and by
+tab_cleaner/utils/chords.chord_variations.
+
+Lines are classified as BLANK, CHORD (only chords separated by whitespace) or LYRIC.
+Tabs repeat the same lines over and over (the chords of every verse, the chorus...), so
+the per-line functions are memoized.
+"""
+
+import re
+from functools import lru_cache
+
+# --- Grammar ---
+ROOT = r"[A-G][#b]?"
+QUALITY = r"(?:maj|min|m|sus|dim|aug)?"
+NUMBER = r"\d*"
+CHORD = ROOT + QUALITY + NUMBER
+
+CHORD_TOKEN = re.compile(rf"\b{CHORD}\b")  # A chord inside any line
+CHORD_LINE = re.compile(rf"{CHORD}(?:\s+{CHORD})*")  # A stripped line of chords only
+EXTRA_SPACES = re.compile(r"\s{2,}")
+
+# Line kinds
+BLANK = "blank"
+CHORD_ONLY = "chord"
+LYRIC = "lyric"
+
+CACHE_SIZE = 65536  # Distinct lines remembered by the memoized functions
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_line(line: str) -> str:
+    """Returns BLANK, CHORD_ONLY or LYRIC for one line of a tab."""
+    stripped = line.strip()
+    if not stripped:
+        return BLANK
+    if CHORD_LINE.fullmatch(stripped):
+        return CHORD_ONLY
+    return LYRIC
+
+
+def classify_lines(text: str) -> list[str]:
+    """Classifies every line of a tab."""
+    return [classify_line(line) for line in text.splitlines()]
+
+
+def has_chord_line(text: str) -> bool:
+    """Checks if the text contains at least one chord-only line."""
+    return any(classify_line(line) == CHORD_ONLY for line in text.splitlines())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def remove_chords(line: str) -> str:
+    """Removes the chords of a line, collapses the spaces left behind and strips it.
+    Blank and chord-only lines become empty strings."""
+    if classify_line(line) != LYRIC:
+        return ""
+    without_chords = CHORD_TOKEN.sub("", line)
+    return EXTRA_SPACES.sub(" ", without_chords).strip()
@@ -0,0 +1,87 @@
+"""File discovery shared by the pipeline stages.
+Directories are walked with os.scandir, whose entries already know if they are files or
+directories (from the directory listing itself on most file systems), so no extra stat
+call is made per file. Paths are yielded lazily, so a stage can start working before the
+whole tree has been listed.
+
+The stages are run as scripts from the tab_processor directory, so they add it to
+sys.path before importing this module:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+"""
+
+import os
+import zlib
+from collections.abc import Iterable, Iterator
+
+
+def iter_files(
+    root: str,
+    suffixes: Iterable[str] = None,
+    shard: tuple[int, int] = None,
+) -> Iterator[str]:
+    """Yields the path of every file under a directory, recursively.
+    Args:
+        root (str): Directory to walk. Nothing is yielded if it does not exist.
+                    Directories that cannot be read, and symbolic links to
+                    directories, are skipped.
+        suffixes (Iterable[str], optional): Only yield files whose name ends with one of
+                                            these (case insensitive), e.g. (".txt",).
+                                            Defaults to None (every file).
+        shard (tuple[int, int], optional): (index, count): only yield the files of shard
+                                           `index` out of `count`, see shard_of.
+                                           Defaults to None (every file).
+    Yields:
+        str: File paths, joined to `root` like os.walk does.
+    """
+    if suffixes is not None:
+        suffixes = tuple(suffix.lower() for suffix in suffixes)
+
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            scanner = os.scandir(directory)
+        except OSError:
+            # Missing, not a directory or unreadable (e.g. PermissionError)
+            continue
+        subdirectories = []
+        with scanner:
+            for entry in scanner:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                    continue
+                # Symbolic links are followed, but only to files: not to directories
+                # (like rglob, which does not walk into them) nor broken ones
+                if not entry.is_file():
+                    continue
+                if suffixes is not None and not entry.name.lower().endswith(suffixes):
+                    continue
+                if shard is not None and shard_of(entry.path, shard[1]) != shard[0]:
+                    continue
+                yield entry.path
+        # Reversed so subdirectories are visited in listing order
+        pending.extend(reversed(subdirectories))
+
+
+def count_files(root: str, suffixes: Iterable[str] = None) -> int:
+    """Counts the files under a directory, recursively, without building a list."""
+    return sum(1 for _ in iter_files(root, suffixes))
+
+
+def shard_of(path: str, count: int) -> int:
+    """Stable shard number (0 to count - 1) for a path.
+    It only depends on the path, so several workers can each walk the tree with a
+    different shard index and together process every file exactly once."""
+    return zlib.crc32(path.encode("utf-8", "surrogateescape")) % count
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Groups items into lists of `size` (the last one may be shorter)."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,54 @@
+"""Word normalization shared by the insights and indexer stages.
+
+A word is lowercased and stripped of everything but Spanish letters; words of two
+letters or less and STOPWORDS are not content words. Whole texts are normalized in one
+regex pass and split afterwards, which gives the same words as normalizing each
+whitespace-separated token on its own.
+"""
+
+import re
+from collections.abc import Iterator
+
+# Everything but letters; the second one keeps whitespace, so a whole text can be
+# normalized at once and split into words afterwards
+NON_LETTERS = re.compile(r"[^a-záéíóúüñ]")
+NON_LETTERS_OR_SPACES = re.compile(r"[^a-záéíóúüñ\s]+")
+
+MIN_WORD_LENGTH = 3
+
+# Quick list of Spanish stopwords to filter out
+# fmt: off
+STOPWORDS = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas",
+    "y", "o", "u", "de", "del", "al", "a", "en", "por", "para",
+    "con", "sin", "que", "como", "se", "me", "te", "lo", "le",
+    "mi", "mis", "tu", "tus", "su", "sus", "nos", "vos",
+    "ya", "no", "si", "sí", "pero", "más", "mas"
+}
+# fmt: on
+
+
+def normalize_word(word: str) -> str:
+    """Lowercases a word and removes every character that is not a letter."""
+    return NON_LETTERS.sub("", word.lower())
+
+
+def is_content_word(word: str) -> bool:
+    """Tells if a normalized word is long enough and not a stopword."""
+    return len(word) >= MIN_WORD_LENGTH and word not in STOPWORDS
+
+
+def extract_words(text: str) -> list[str]:
+    """Returns the normalized content words of a text, in order."""
+    normalized = NON_LETTERS_OR_SPACES.sub("", text.lower())
+    return [word for word in normalized.split() if is_content_word(word)]
+
+
+def iter_positions(text: str) -> Iterator[tuple[int, str]]:
+    """Yields (position, word) for the content words of a text.
+    Positions count every normalized word, stopwords and short words included, so
+    the gaps they leave are kept (e.g. for phrase queries)."""
+    normalized = NON_LETTERS_OR_SPACES.sub("", text.lower())
+    for position, word in enumerate(normalized.split()):
+        if is_content_word(word):
+            yield position, word
@@ -0,0 +1,70 @@
+"""Manifest of the validator's verdicts, read by the later stages.
+
+validations/manifest.jsonl has one JSON object per cleaned file:
+    {"file": "songs/a/song.txt", "source": "./files/cleaned/songs/a/song.txt",
+     "status": "ko", "rule": "chord_line", "lines": 42, "micros": 180}
+"file" is the path relative to the cleaned directory (and to validations/ok or ko), and
+"source" the cleaned file the verdict was given for. With it, the validator does not
+need to copy the songs into ok/ko: later stages can read them from the cleaned tree.
+The rest is a report to look for borderline or slow songs: the rule the song failed
+(null if it is valid), its number of lines and the validation time in microseconds.
+"""
+
+import os
+import json
+from collections.abc import Iterator
+
+MANIFEST_FILE = os.path.join("files", "validations", "manifest.jsonl")
+
+OK = "ok"
+KO = "ko"
+
+
+class ManifestWriter:
+    """Writes the manifest line by line into a temporary file, which only replaces the
+    previous manifest when the writer is closed without errors.
+
+    Args:
+        path (str): Location of the manifest.
+    """
+
+    def __init__(self, path: str = MANIFEST_FILE):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+
+    def write(self, entry: dict):
+        """Writes one entry (at least "file", "source" and "status")."""
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_verdicts(path: str = MANIFEST_FILE, status: str = None) -> Iterator[dict]:
+    """Yields the manifest entries, optionally only those with the given status.
+    Yields nothing if there is no manifest."""
+    if not os.path.isfile(path):
+        return
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if status is None or entry["status"] == status:
+                yield entry
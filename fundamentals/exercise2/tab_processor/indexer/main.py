@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import click
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared modules (common/) live in tab_processor, the parent of this stage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.discovery import iter_files, batched
+from common.text import iter_positions
+from utils.inverted_index import InvertedIndex, INDEX_FILE
+from utils.query import search
+
+# Lyrics generated by the lyrics stage: <LYRICS_ROOT>/<artist>/<song>_lyrics.txt
+LYRICS_ROOT = os.path.join("files", "lyrics", "songs")
+LYRICS_SUFFIX = "_lyrics.txt"
+SHARD_SIZE = 100  # Files handed to a worker at a time
+PROGRESS_EVERY = 5  # Seconds between progress lines
+
+
+def tokenize_file(path: str) -> tuple:
+    """
+    Read a lyrics file and return what the index stores about it:
+    (path, artist, song, mtime_ns, size, {word: positions}).
+    """
+    stat = os.stat(path)
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    positions = defaultdict(list)
+    for position, word in iter_positions(text):
+        positions[word].append(position)
+
+    artist = os.path.basename(os.path.dirname(path))
+    song = os.path.basename(path)[: -len(LYRICS_SUFFIX)]
+    return path, artist, song, stat.st_mtime_ns, stat.st_size, dict(positions)
+
+
+def tokenize_shard(paths: list[str]) -> list[tuple]:
+    """Tokenize a group of lyrics files (in a worker process when --workers > 1)."""
+    documents = []
+    for path in paths:
+        try:
+            documents.append(tokenize_file(path))
+        except OSError as e:
+            print(f"Error reading {path}: {e}")
+    return documents
+
+
+@click.group()
+def main():
+    """Full-text search over the lyrics generated by the lyrics stage."""
+
+
+@main.command()
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes reading and tokenizing lyrics in parallel.",
+)
+@click.option(
+    "--force",
+    "-f",
+    is_flag=True,
+    default=False,
+    help="Index every lyrics file again, even if it did not change.",
+)
+def build(workers, force):
+    """
+    Build or update the inverted index of the lyrics.
+
+    Only the lyrics files that are new or whose mtime or size changed since the
+    last build are read; the documents of deleted files are removed. The
+    posting lists of the words they contain are packed again at the end.
+    """
+    if not os.path.exists(LYRICS_ROOT):
+        print(f"Directory not found: {LYRICS_ROOT}")
+        return
+
+    index = InvertedIndex(INDEX_FILE)
+    try:
+        if force:
+            index.clear()
+        known = index.known_files()
+
+        paths = []
+        seen = set()
+        for path in iter_files(LYRICS_ROOT, suffixes=(LYRICS_SUFFIX,)):
+            seen.add(path)
+            stat = os.stat(path)
+            if known.get(path) != (stat.st_mtime_ns, stat.st_size):
+                paths.append(path)
+        removed = known.keys() - seen
+        print(
+            f"Found {len(seen)} lyrics files: {len(paths)} to index, "
+            f"{len(seen) - len(paths)} unchanged, {len(removed)} removed.\n"
+        )
+
+        for path in removed:
+            index.remove_document(path)
+
+        indexed = 0
+        last_progress = time.monotonic()
+        executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        try:
+            results = (executor.map if executor else map)(
+                tokenize_shard, batched(paths, SHARD_SIZE)
+            )
+            for documents in results:
+                for document in documents:
+                    index.replace_document(*document)
+                indexed += len(documents)
+                if time.monotonic() - last_progress >= PROGRESS_EVERY:
+                    last_progress = time.monotonic()
+                    index.commit()
+                    print(f"Progress: {indexed}/{len(paths)} files")
+        finally:
+            if executor:
+                executor.shutdown()
+        # The packed posting lists of the changed words are rebuilt once, at the end
+        packed = index.pack()
+        index.commit()
+        count, average = index.stats()
+    finally:
+        index.close()
+
+    print("Indexing finished.")
+    print(f"Files indexed: {indexed}, words updated: {packed}")
+    print(f"Documents in the index: {count} (average length {average:.1f} words)")
+    print(f"Index saved in: {INDEX_FILE}")
+
+
+@main.command()
+@click.argument("text")
+@click.option(
+    "--limit",
+    "-n",
+    default=10,
+    type=click.IntRange(min=1),
+    help="Number of results to show.",
+)
+def query(text, limit):
+    """
+    Search the lyrics and show the best matches, ranked with BM25.
+
+    Words are all required (AND can be written, but is implicit), OR separates
+    alternatives and double quotes search for a phrase, e.g.:
+    'corazón "te quiero" OR adiós'.
+    """
+    if not INDEX_FILE.exists():
+        print(f"Index not found: {INDEX_FILE} (run indexer/main.py build first)")
+        return
+
+    index = InvertedIndex(INDEX_FILE)
+    try:
+        if not index.is_packed():
+            print("Warning: the last build did not finish, run it again.\n")
+        start = time.perf_counter()
+        total, results = search(index, text, limit)
+        elapsed = time.perf_counter() - start
+    finally:
+        index.close()
+
+    print(f"{total} matching songs ({elapsed * 1000:.1f} ms)\n")
+    for rank, (score, artist, song, path) in enumerate(results, start=1):
+        print(f"  {rank}. [{score:.2f}] {artist} - {song}  ({path})")
+
+
+if __name__ == "__main__":
+    main()
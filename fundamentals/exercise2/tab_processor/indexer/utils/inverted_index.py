@@ -0,0 +1,253 @@
+"""On-disk positional inverted index of the lyrics (SQLite).
+
+Each lyrics file is a document. Its words are normalized like in insights (see
+common/text.py), and each content word has one posting with its frequency in the
+document and its positions, so phrases can be matched without reading the lyrics.
+
+Reading a posting list row by row is slow in Python for words found in most songs, so
+the list of each term is also kept packed in a single row: the ids of its documents,
+its frequencies and the documents' lengths, as arrays of unsigned ints. The per
+document rows are what is updated when a song changes; the terms they touch are marked
+as stale and their packed lists are rebuilt by pack(), once per build.
+
+Tables:
+    docs(id, path, artist, song, mtime_ns, size, length)   length = content words
+    postings(term, doc, tf, positions)                     one row per term and doc
+    terms(term, df, docs, tfs, lengths)                    packed posting lists
+    stale(term)                                            terms to pack again
+    meta(key, value)                                       documents and avg length
+"""
+
+import json
+import sqlite3
+from array import array
+from itertools import groupby
+from pathlib import Path
+
+INDEX_FILE = Path("files/index/lyrics_index.sqlite")
+INT_TYPE = "I"  # array typecode of the packed ints
+PACK_BATCH = 1000  # Terms packed per query
+
+
+def pack_ints(values) -> bytes:
+    return array(INT_TYPE, values).tobytes()
+
+
+def unpack_ints(blob: bytes) -> array:
+    values = array(INT_TYPE)
+    values.frombytes(blob)
+    return values
+
+
+class InvertedIndex:
+    """Positional inverted index of the lyrics files.
+
+    Args:
+        path (str | Path, optional): Location of the SQLite database.
+                                     Defaults to INDEX_FILE.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 64 MB of page cache: the postings of a song go all over the (term, doc) tree
+        self._conn.execute("PRAGMA cache_size=-65536")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                artist TEXT NOT NULL,
+                song TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                positions BLOB NOT NULL,
+                PRIMARY KEY (term, doc)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL,
+                docs BLOB NOT NULL,
+                tfs BLOB NOT NULL,
+                lengths BLOB NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS stale (term TEXT PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL);
+            """
+        )
+        self._conn.commit()
+
+    # --- Building ---
+
+    def known_files(self) -> dict[str, tuple[int, int]]:
+        """Returns {path: (mtime_ns, size)} of every indexed document."""
+        rows = self._conn.execute("SELECT path, mtime_ns, size FROM docs")
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def replace_document(
+        self,
+        path: str,
+        artist: str,
+        song: str,
+        mtime_ns: int,
+        size: int,
+        positions: dict[str, list[int]],
+    ):
+        """Indexes a document, replacing its previous postings if it was indexed.
+        Args:
+            positions (dict[str, list[int]]): Positions of each content word.
+        """
+        self.remove_document(path)
+        length = sum(len(term_positions) for term_positions in positions.values())
+        doc = self._conn.execute(
+            "INSERT INTO docs (path, artist, song, mtime_ns, size, length) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, artist, song, mtime_ns, size, length),
+        ).lastrowid
+        self._conn.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?)",
+            [
+                (term, doc, len(term_positions), pack_ints(term_positions))
+                for term, term_positions in positions.items()
+            ],
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO stale VALUES (?)", [(term,) for term in positions]
+        )
+
+    def remove_document(self, path: str):
+        """Removes a document and its postings. Does nothing if it is not indexed."""
+        row = self._conn.execute(
+            "SELECT id FROM docs WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return
+        doc = row[0]
+        self._conn.execute(
+            "INSERT OR IGNORE INTO stale SELECT term FROM postings WHERE doc = ?",
+            (doc,),
+        )
+        self._conn.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+        self._conn.execute("DELETE FROM docs WHERE id = ?", (doc,))
+
+    def clear(self):
+        """Removes every document."""
+        self._conn.executescript(
+            """
+            DELETE FROM postings; DELETE FROM terms; DELETE FROM stale;
+            DELETE FROM docs; DELETE FROM meta;
+            """
+        )
+
+    def pack(self) -> int:
+        """Rebuilds the packed posting lists of the stale terms, and the document
+        statistics. Returns the number of terms packed."""
+        stale = [row[0] for row in self._conn.execute("SELECT term FROM stale")]
+        for start in range(0, len(stale), PACK_BATCH):
+            batch = stale[start : start + PACK_BATCH]
+            rows = self._conn.execute(
+                """
+                SELECT p.term, p.doc, p.tf, d.length
+                FROM postings p JOIN docs d ON d.id = p.doc
+                WHERE p.term IN (SELECT value FROM json_each(?))
+                ORDER BY p.term, p.doc
+                """,
+                (json.dumps(batch),),
+            )
+            packed = []
+            for term, postings in groupby(rows, key=lambda row: row[0]):
+                _, *columns = zip(*postings)
+                packed.append(
+                    (term, len(columns[0]), *(pack_ints(values) for values in columns))
+                )
+            self._conn.execute(
+                "DELETE FROM terms WHERE term IN (SELECT value FROM json_each(?))",
+                (json.dumps(batch),),
+            )
+            self._conn.executemany("INSERT INTO terms VALUES (?, ?, ?, ?, ?)", packed)
+
+        self._conn.execute("DELETE FROM stale")
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO meta
+            SELECT 'documents', COUNT(*) FROM docs
+            UNION ALL SELECT 'average_length', COALESCE(AVG(length), 0) FROM docs
+            """
+        )
+        return len(stale)
+
+    def commit(self):
+        self._conn.commit()
+
+    # --- Querying ---
+
+    def stats(self) -> tuple[int, float]:
+        """Returns the number of documents and their average length, as of the last
+        pack()."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        return int(meta.get("documents", 0)), meta.get("average_length", 0.0)
+
+    def is_packed(self) -> bool:
+        """Tells if every change is already in the packed posting lists."""
+        return self._conn.execute("SELECT 1 FROM stale LIMIT 1").fetchone() is None
+
+    def document_frequencies(self, terms: list[str]) -> dict[str, int]:
+        """Returns the number of documents of each term (0 if it is not indexed)."""
+        rows = self._conn.execute(
+            "SELECT term, df FROM terms WHERE term IN (SELECT value FROM json_each(?))",
+            (json.dumps(terms),),
+        )
+        frequencies = dict.fromkeys(terms, 0)
+        frequencies.update(rows)
+        return frequencies
+
+    def postings(self, term: str) -> tuple[array, array, array]:
+        """Returns the packed posting list of a term: the ids of its documents (in
+        increasing order), its frequency in each of them and their lengths."""
+        row = self._conn.execute(
+            "SELECT docs, tfs, lengths FROM terms WHERE term = ?", (term,)
+        ).fetchone()
+        if row is None:
+            return array(INT_TYPE), array(INT_TYPE), array(INT_TYPE)
+        return tuple(unpack_ints(blob) for blob in row)
+
+    def positions(self, term: str, docs: list[int] = None) -> dict[int, array]:
+        """Returns the positions of a term in each of its documents or, if `docs` is
+        given, only in those (read with primary key lookups, not a scan of the term)."""
+        if docs is None:
+            rows = self._conn.execute(
+                "SELECT doc, positions FROM postings WHERE term = ?", (term,)
+            )
+        else:
+            rows = self._conn.execute(
+                """
+                SELECT doc, positions FROM postings
+                WHERE term = ? AND doc IN (SELECT value FROM json_each(?))
+                """,
+                (term, json.dumps(docs)),
+            )
+        return {doc: unpack_ints(blob) for doc, blob in rows}
+
+    def documents(self, docs: list[int]) -> dict[int, tuple[str, str, str]]:
+        """Returns {doc: (artist, song, path)} of the given documents."""
+        rows = self._conn.execute(
+            """
+            SELECT id, artist, song, path FROM docs
+            WHERE id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(docs),),
+        )
+        return {doc: tuple(fields) for doc, *fields in rows}
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,195 @@
+"""Parsing, matching and BM25 ranking of the search queries.
+
+Syntax:
+    amor corazón          both words (AND is implicit, and can also be written)
+    amor OR corazón       either of them
+    "te quiero mucho"     the phrase, word after word
+    "sin ti" OR adiós     clauses separated by OR can mix words and phrases
+Query words are normalized like the indexed ones (see common/text.py), so stopwords and
+short words are ignored, except that they still count as gaps inside a phrase.
+
+Each word is scored with BM25 in all its documents at once, from its packed posting
+list (see inverted_index.py). A clause matches the intersection of the documents of its
+words, starting with the rarest one, and the positions of the phrase words are only
+read for those documents. A document matching any clause is scored with the words of
+the clauses it matches, and only the best `limit` have their songs read from the index.
+"""
+
+import heapq
+import math
+import re
+from dataclasses import dataclass, field
+
+from common.text import iter_positions, normalize_word, is_content_word
+from utils.inverted_index import InvertedIndex
+
+# BM25 parameters: term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# A primary key lookup of a posting costs about as much as reading this many
+# postings of a scan
+LOOKUP_COST = 3
+
+# A quoted phrase or a single word
+QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+OR = "OR"
+AND = "AND"
+
+
+@dataclass
+class Clause:
+    """Words (and phrases) that a document must all contain."""
+
+    terms: set[str] = field(default_factory=set)
+    # (offset, word) of each content word of a phrase, the first one at offset 0
+    phrases: list[list[tuple[int, str]]] = field(default_factory=list)
+
+
+def parse_query(text: str) -> list[Clause]:
+    """Splits a query into its OR clauses, leaving out the empty ones."""
+    clauses = [Clause()]
+    for match in QUERY_TOKEN.finditer(text):
+        phrase, word = match.groups()
+        if word == OR:
+            clauses.append(Clause())
+        elif word == AND:
+            continue
+        elif word is not None:
+            word = normalize_word(word)
+            if is_content_word(word):
+                clauses[-1].terms.add(word)
+        else:
+            words = list(iter_positions(phrase))
+            if len(words) == 1:
+                clauses[-1].terms.add(words[0][1])
+            elif words:
+                first = words[0][0]
+                clauses[-1].phrases.append(
+                    [(position - first, word) for position, word in words]
+                )
+                clauses[-1].terms.update(word for _, word in words)
+    return [clause for clause in clauses if clause.terms]
+
+
+def contains_phrase(offsets: list[int], positions: list) -> bool:
+    """Tells if the words of a phrase appear at their offsets in a document.
+    Args:
+        offsets (list[int]): Offset of each word of the phrase (the first one is 0).
+        positions (list): Positions of each word of the phrase in the document.
+    """
+    # Positions where the phrase could start, according to each word seen so far
+    starts = set(positions[0])
+    for offset, word_positions in zip(offsets[1:], positions[1:]):
+        starts.intersection_update([position - offset for position in word_positions])
+        if not starts:
+            return False
+    return True
+
+
+def term_scores(
+    index: InvertedIndex, term: str, idf: float, average: float
+) -> dict[int, float]:
+    """Returns the BM25 score of a term in each of its documents, from its packed
+    posting list."""
+    docs, tfs, lengths = index.postings(term)
+    weight = idf * (K1 + 1)
+    return {
+        doc: weight * tf / (tf + K1 * (1 - B + B * length / average))
+        for doc, tf, length in zip(docs, tfs, lengths)
+    }
+
+
+def match_clause(index: InvertedIndex, clause: Clause, scores: dict) -> set[int]:
+    """Returns the documents containing every word and phrase of a clause.
+    Args:
+        scores (dict): {term: {doc: score}} of every word of the clause.
+    """
+    # Intersection starting from the rarest word, so the sets only shrink
+    terms = sorted(clause.terms, key=lambda term: len(scores[term]))
+    matches = set(scores[terms[0]])
+    for term in terms[1:]:
+        matches.intersection_update(scores[term])
+        if not matches:
+            return matches
+
+    # Positions are only read for the documents that have all the words: with
+    # lookups if they are a few of the documents of the word, else with a scan
+    for phrase in clause.phrases:
+        candidates = list(matches)
+        positions = [
+            index.positions(
+                word,
+                candidates
+                if len(candidates) * LOOKUP_COST < len(scores[word])
+                else None,
+            )
+            for _, word in phrase
+        ]
+        offsets = [offset for offset, _ in phrase]
+        matches = {
+            doc
+            for doc in candidates
+            if contains_phrase(offsets, [word[doc] for word in positions])
+        }
+    return matches
+
+
+def add_scores(docs, terms, scores: dict) -> dict[int, float]:
+    """Returns the sum of the scores of the given words in each document. The sum is
+    done one word at a time, over all the documents, which is much faster than one
+    document at a time."""
+    first, *rest = terms
+    totals = {doc: scores[first][doc] for doc in docs}
+    for term in rest:
+        word_scores = scores[term]
+        totals = {doc: total + word_scores[doc] for doc, total in totals.items()}
+    return totals
+
+
+def search(index: InvertedIndex, text: str, limit: int = 10) -> tuple[int, list]:
+    """Runs a query against the index.
+    Returns:
+        tuple[int, list]: The number of matching documents, and the best `limit` of
+                          them as (score, artist, song, path), best first.
+    """
+    clauses = parse_query(text)
+    if not clauses:
+        return 0, []
+
+    count, average = index.stats()
+    terms = set().union(*(clause.terms for clause in clauses))
+    frequencies = index.document_frequencies(sorted(terms))
+    scores = {
+        term: term_scores(
+            index, term, math.log(1 + (count - df + 0.5) / (df + 0.5)), average
+        )
+        for term, df in frequencies.items()
+        if df
+    }
+
+    matches = [
+        (clause, match_clause(index, clause, scores))
+        for clause in clauses
+        if all(term in scores for term in clause.terms)
+    ]
+    totals = {}
+    for clause, docs in matches:
+        totals.update(add_scores(docs, clause.terms, scores))
+
+    # A document matching several clauses is scored with the words of all of them
+    seen = set()
+    overlap = set()
+    for _, docs in matches:
+        overlap |= seen & docs
+        seen |= docs
+    for doc in overlap:
+        terms = set().union(*(clause.terms for clause, docs in matches if doc in docs))
+        totals[doc] = sum(scores[term][doc] for term in terms)
+    if not totals:
+        return 0, []
+
+    # Ties go to the document indexed first
+    best = heapq.nlargest(limit, totals.items(), key=lambda item: (item[1], -item[0]))
+    documents = index.documents([doc for doc, _ in best])
+    return len(totals), [(score, *documents[doc]) for doc, score in best]
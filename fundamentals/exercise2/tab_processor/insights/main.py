@@ -1,128 +1,316 @@
+import os
+import sys
 from pathlib import Path
 from collections import Counter, defaultdict
-import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import click
+from utils.topk import TopKSummary, most_common
+from utils.word_index import WordIndex, INDEX_FILE
 
-# Directorio base de las letras ya validadas y limpias
-LYRICS_ROOT = Path("files/validations/ok/cleaned/songs")
+# Los módulos compartidos (common/) están en tab_processor, el padre de esta etapa
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Normalización y palabras vacías, compartidas con el índice de búsqueda (indexer)
+from common.text import extract_words
+
+# Directorio base de las letras ya validadas y limpias (generadas por lyrics)
+LYRICS_ROOT = Path("files/lyrics/songs")
 OUTPUT_DIR = Path("files/insights")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+CHUNK_SIZE = 1 << 20  # Caracteres (aprox.) leídos de golpe de cada archivo de letras
+ARTISTS_PER_SHARD = 20  # Artistas que procesa cada tarea del modo paralelo
+
+
+def count_lyrics_file(lyrics_file: Path, out, counter: Counter = None):
+    """
+    Copia un archivo de letras en `out` y cuenta sus palabras en `counter`
+    (si se indica), por bloques de líneas completas de unos CHUNK_SIZE
+    caracteres, sin cargar el archivo entero en memoria.
+    """
+    with lyrics_file.open("r", encoding="utf-8", errors="ignore") as f:
+        for lines in iter(lambda: f.readlines(CHUNK_SIZE), []):
+            chunk = "".join(lines)
+            out.write(chunk)
+            if counter is not None:
+                counter.update(extract_words(chunk))
+
+
+def process_artist(artist: str, lyrics_files: list[Path]) -> Counter:
+    """
+    Fusiona las letras de un artista en <artista>_all_lyrics.txt, leyendo cada
+    archivo una sola vez, y devuelve el recuento de sus palabras.
+    """
+    counter = Counter()
+    merged_path = OUTPUT_DIR / f"{artist}_all_lyrics.txt"
+    with merged_path.open("w", encoding="utf-8") as out:
+        for i, lyrics_file in enumerate(lyrics_files):
+            # Separador entre letras, igual que el antiguo "\n\n".join
+            if i:
+                out.write("\n\n")
+            try:
+                count_lyrics_file(lyrics_file, out, counter)
+            except Exception as e:
+                print(f"Error reading {lyrics_file}: {e}")
+                continue
+    return counter
+
+
+def process_shard(artists: list[tuple[str, list[Path]]], capacity: int = 0):
+    """
+    Fase "map": procesa un grupo de artistas (en un proceso aparte si hay
+    varios workers). Devuelve el top 10 de cada artista y el recuento del grupo:
+    completo, o resumido a `capacity` palabras si capacity > 0.
+    """
+    artist_top_words = {}
+    shard_counter = Counter()
+    for artist, lyrics_files in artists:
+        counter = process_artist(artist, lyrics_files)
+        artist_top_words[artist] = most_common(counter, 10)
+        shard_counter.update(counter)
+    if capacity:
+        return artist_top_words, TopKSummary.from_counter(shard_counter, capacity)
+    return artist_top_words, shard_counter
+
+
+def process_artist_incremental(artist: str, lyrics_files: list[Path], changed: set):
+    """
+    Vuelve a fusionar las letras de un artista, pero solo cuenta las palabras
+    de los archivos cambiados. Devuelve (path, mtime_ns, size, recuento) de
+    cada uno de ellos, para actualizar el índice.
+    """
+    updates = []
+    merged_path = OUTPUT_DIR / f"{artist}_all_lyrics.txt"
+    with merged_path.open("w", encoding="utf-8") as out:
+        for i, lyrics_file in enumerate(lyrics_files):
+            if i:
+                out.write("\n\n")
+            counter = Counter() if str(lyrics_file) in changed else None
+            stat = lyrics_file.stat()
+            try:
+                count_lyrics_file(lyrics_file, out, counter)
+            except Exception as e:
+                print(f"Error reading {lyrics_file}: {e}")
+                continue
+            if counter is not None:
+                updates.append(
+                    (str(lyrics_file), stat.st_mtime_ns, stat.st_size, counter)
+                )
+    return updates
 
-def normalize_word(word: str) -> str:
+
+def process_shard_incremental(artists: list[tuple[str, list[Path], set]]):
+    """Fase "map" del modo --index: procesa un grupo de artistas con cambios."""
+    return [
+        (artist, process_artist_incremental(artist, lyrics_files, changed))
+        for artist, lyrics_files, changed in artists
+    ]
+
+
+def map_shards(function, items: list, workers: int):
     """
-    Normaliza una palabra:
-    - Pasa a minúsculas
-    - Elimina caracteres no alfabéticos
+    Aplica `function` a grupos de ARTISTS_PER_SHARD elementos, en un pool de
+    procesos si workers > 1, y devuelve sus resultados en orden.
     """
-    word = word.lower()
-    # Nos quedamos solo con letras (sin números ni signos)
-    word = re.sub(r"[^a-záéíóúüñ]", "", word)
-    return word
+    shards = [
+        items[i : i + ARTISTS_PER_SHARD]
+        for i in range(0, len(items), ARTISTS_PER_SHARD)
+    ]
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        yield from (executor.map if executor else map)(function, shards)
+    finally:
+        if executor:
+            executor.shutdown()
 
 
-# Lista rápida de palabras vacías en español para filtrar
-STOPWORDS = {
-    "el", "la", "los", "las", "un", "una", "unos", "unas",
-    "y", "o", "u", "de", "del", "al", "a", "en", "por", "para",
-    "con", "sin", "que", "como", "se", "me", "te", "lo", "le",
-    "mi", "mis", "tu", "tus", "su", "sus", "nos", "vos",
-    "ya", "no", "si", "sí", "pero", "más", "mas"
-}
+def count_all(files_by_artist: dict, workers: int, approx_capacity: int):
+    """
+    Map-reduce sobre todos los artistas. Devuelve el top 10 de cada artista
+    y el top 20 global.
+    """
+    # Map: cada grupo de artistas se fusiona y se cuenta por separado.
+    # Reduce: el recuento global es la suma de los recuentos de cada grupo,
+    # que se van sumando a medida que llegan (en el orden de los grupos)
+    artist_top_words = {}
+    global_counts = TopKSummary(approx_capacity) if approx_capacity else Counter()
+    results = map_shards(
+        partial(process_shard, capacity=approx_capacity),
+        list(files_by_artist.items()),
+        workers,
+    )
+    for shard_top_words, shard_counts in results:
+        artist_top_words.update(shard_top_words)
+        if approx_capacity:
+            global_counts = global_counts.merge(shard_counts)
+        else:
+            global_counts.update(shard_counts)
+
+    if approx_capacity and not global_counts.is_exact(20):
+        print(
+            "Aviso: el top 20 global es aproximado; "
+            "aumenta --approx-capacity para que sea exacto.\n"
+        )
+    if approx_capacity:
+        return artist_top_words, global_counts.most_common(20)
+    return artist_top_words, most_common(global_counts, 20)
 
 
-def extract_words(text: str):
+def count_with_index(files_by_artist: dict, workers: int):
     """
-    Extrae palabras 'contenido' de un texto:
-    - Normaliza
-    - Filtra vacías y muy cortas
-    (Aproximamos sustantivos/verbos/adjetivos eliminando palabras vacías)
+    Actualiza el índice persistente solo con los archivos nuevos, cambiados o
+    borrados, y saca de él el top 10 de cada artista y el top 20 global.
     """
-    raw_tokens = text.split()
-    words = []
-    for tok in raw_tokens:
-        w = normalize_word(tok)
-        if len(w) <= 2:
-            continue
-        if w in STOPWORDS:
-            continue
-        words.append(w)
-    return words
-
-
-def main():
+    index = WordIndex(OUTPUT_DIR / INDEX_FILE)
+    known = index.known_files()
+
+    # Archivos cuyo mtime o tamaño no coinciden con los del índice
+    tasks = []
+    seen = set()
+    for artist, lyrics_files in files_by_artist.items():
+        changed = set()
+        for lyrics_file in lyrics_files:
+            path = str(lyrics_file)
+            seen.add(path)
+            stat = lyrics_file.stat()
+            if known.get(path) != (artist, stat.st_mtime_ns, stat.st_size):
+                changed.add(path)
+        if changed:
+            tasks.append((artist, lyrics_files, changed))
+
+    # Los artistas con archivos borrados también tienen que volver a fusionarse
+    removed = known.keys() - seen
+    removed_artists = {known[path][0] for path in removed}
+    removed_artists -= {artist for artist, _, _ in tasks}
+    for artist in removed_artists:
+        if artist in files_by_artist:
+            tasks.append((artist, files_by_artist[artist], set()))
+
+    to_count = sum(len(changed) for _, _, changed in tasks)
+    print(
+        f"Índice: {len(seen) - to_count} archivos sin cambios, {to_count} a contar, "
+        f"{len(removed)} borrados\n"
+    )
+
+    try:
+        for path in removed:
+            index.remove_file(path)
+        for shard_results in map_shards(process_shard_incremental, tasks, workers):
+            for artist, updates in shard_results:
+                for path, mtime_ns, size, counter in updates:
+                    index.replace_file(path, artist, mtime_ns, size, counter)
+        index.commit()
+
+        # Los artistas sin palabras contadas aparecen igualmente, con su top vacío
+        artist_top_words = {artist: [] for artist in files_by_artist}
+        artist_top_words.update(index.top_words_by_artist(10))
+        return artist_top_words, index.top_words(20)
+    finally:
+        index.close()
+
+
+@click.command()
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Número de procesos que cuentan palabras en paralelo.",
+)
+@click.option(
+    "--approx-capacity",
+    "-a",
+    default=0,
+    type=click.IntRange(min=0),
+    help=(
+        "Si es mayor que 0, cada proceso solo envía sus N palabras más frecuentes "
+        "y el top global se calcula sin el vocabulario completo (0 = exacto)."
+    ),
+)
+@click.option(
+    "--index",
+    "use_index",
+    is_flag=True,
+    default=False,
+    help=(
+        f"Usa el índice persistente ({INDEX_FILE}): solo se cuentan las letras "
+        "nuevas o cambiadas desde la última ejecución."
+    ),
+)
+@click.option(
+    "--artists",
+    default=None,
+    help=(
+        "Consulta el índice sin leer las letras: top de palabras de estos artistas "
+        "(separados por comas, o 'all' para todos)."
+    ),
+)
+@click.option(
+    "--top",
+    default=20,
+    type=click.IntRange(min=1),
+    help="Número de palabras que muestra --artists.",
+)
+def main(workers, approx_capacity, use_index, artists, top):
+    if use_index and approx_capacity:
+        # El índice guarda los recuentos exactos: no hay resúmenes que aproximar
+        raise click.UsageError("--approx-capacity no se puede usar con --index.")
+
+    if artists:
+        query_index(artists, top)
+        return
+
     if not LYRICS_ROOT.exists():
         print(f"Directory not found: {LYRICS_ROOT}")
         return
 
-    # 1) Leer todas las letras por artista
-    artist_texts = defaultdict(list)
-    total_text = []
+    print("Merging lyrics and computing insights...\n")
 
+    # 1) Agrupar los archivos de letras por artista (parent.name = nombre del artista)
+    files_by_artist = defaultdict(list)
     for lyrics_file in LYRICS_ROOT.rglob("*_lyrics.txt"):
-        # parent.name = nombre del artista
-        artist = lyrics_file.parent.name
-        try:
-            text = lyrics_file.read_text(encoding="utf-8", errors="ignore")
-        except Exception as e:
-            print(f"Error reading {lyrics_file}: {e}")
-            continue
-
-        artist_texts[artist].append(text)
-        total_text.append(text)
-
-    if not artist_texts:
+        files_by_artist[lyrics_file.parent.name].append(lyrics_file)
+
+    if not files_by_artist:
         print("No lyrics files found.")
         return
 
-    print("Merging lyrics and computing insights...\n")
-
-    # 2) Fusionar letras y escribir un archivo por artista
-    artist_word_counts = {}
-
-    for artist, texts in artist_texts.items():
-        merged_text = "\n\n".join(texts)
-
-        # Guardar letras fusionadas por artista
-        merged_path = OUTPUT_DIR / f"{artist}_all_lyrics.txt"
-        merged_path.write_text(merged_text, encoding="utf-8")
-
-        # Contar palabras del artista
-        words = extract_words(merged_text)
-        counter = Counter(words)
-        artist_word_counts[artist] = counter
-
-    # 3) Contar globalmente
-    global_text = "\n\n".join(total_text)
-    global_words = extract_words(global_text)
-    global_counter = Counter(global_words)
+    # 2-3) Contar: todo con map-reduce, o solo los cambios con el índice
+    if use_index:
+        artist_top_words, global_top_words = count_with_index(files_by_artist, workers)
+    else:
+        artist_top_words, global_top_words = count_all(
+            files_by_artist, workers, approx_capacity
+        )
 
     # 4) Mostrar resultados por artista (top 10)
     print("Top 10 palabras por artista\n")
-    for artist, counter in sorted(artist_word_counts.items()):
+    for artist, top_words in sorted(artist_top_words.items()):
         print(f"Artista: {artist}")
-        for i, (word, freq) in enumerate(counter.most_common(10), start=1):
+        for i, (word, freq) in enumerate(top_words, start=1):
             print(f"  {i}. {word}: {freq}")
         print()
 
     # 5) Mostrar resultados globales (top 20)
     print("Top 20 palabras globales\n")
-    for i, (word, freq) in enumerate(global_counter.most_common(20), start=1):
+    for i, (word, freq) in enumerate(global_top_words, start=1):
         print(f"  {i}. {word}: {freq}")
 
     # 6) También guardamos los resultados en archivos de texto
     #    Un archivo por artista con su top-10
-    for artist, counter in artist_word_counts.items():
+    for artist, top_words in artist_top_words.items():
         out_path = OUTPUT_DIR / f"{artist}_top10_words.txt"
         lines = [
             f"Top 10 palabras para el artista: {artist}\n",
         ]
-        for i, (word, freq) in enumerate(counter.most_common(10), start=1):
+        for i, (word, freq) in enumerate(top_words, start=1):
             lines.append(f"{i}. {word}: {freq}\n")
         out_path.write_text("".join(lines), encoding="utf-8")
 
     #    Archivo global con el top-20
     global_out = OUTPUT_DIR / "global_top20_words.txt"
     lines = ["Top 20 palabras globales:\n"]
-    for i, (word, freq) in enumerate(global_counter.most_common(20), start=1):
+    for i, (word, freq) in enumerate(global_top_words, start=1):
         lines.append(f"{i}. {word}: {freq}\n")
     global_out.write_text("".join(lines), encoding="utf-8")
 
@@ -130,5 +318,26 @@ def main():
     print(f"Outputs saved in: {OUTPUT_DIR}")
 
 
+def query_index(artists: str, top: int):
+    """Muestra el top de palabras de varios artistas consultando solo el índice."""
+    index_path = OUTPUT_DIR / INDEX_FILE
+    if not index_path.exists():
+        print(f"Index not found: {index_path} (run insights with --index first)")
+        return
+
+    selected = None
+    if artists != "all":
+        selected = [artist.strip() for artist in artists.split(",") if artist.strip()]
+    index = WordIndex(index_path)
+    try:
+        top_words = index.top_words(top, selected)
+    finally:
+        index.close()
+
+    print(f"Top {top} palabras para: {artists}\n")
+    for i, (word, freq) in enumerate(top_words, start=1):
+        print(f"  {i}. {word}: {freq}")
+
+
 if __name__ == "__main__":
     main()
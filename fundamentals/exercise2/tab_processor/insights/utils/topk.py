@@ -0,0 +1,100 @@
+"""
+Resumen acotado y combinable de las palabras más frecuentes.
+
+Cada proceso resume sus recuentos quedándose solo con las `capacity` palabras
+más frecuentes, y el proceso principal combina los resúmenes sin llegar a
+construir nunca el vocabulario global completo.
+
+Para cada palabra guardada se conoce una cota inferior y una superior de su
+frecuencia real, y `floor` acota la frecuencia de cualquier palabra que no
+esté en el resumen. Al combinar dos resúmenes, a una palabra que falta en uno
+de ellos se le suma el `floor` de ese resumen en la cota superior (podría
+estar justo por debajo del corte) y nada en la inferior. Con una capacidad
+bastante mayor que el top pedido, el resultado suele ser exacto, y
+`is_exact` lo comprueba.
+
+En todos los tops los empates se ordenan alfabéticamente (ver `most_common`),
+igual que en el índice persistente, así que todos los modos dan el mismo top.
+"""
+
+import heapq
+from collections import Counter
+
+
+def by_frequency(item: tuple[str, int]) -> tuple[int, str]:
+    """Clave de orden: más frecuentes primero y, a igual frecuencia, alfabético."""
+    word, count = item
+    return -count, word
+
+
+def most_common(counts: dict, n: int) -> list[tuple[str, int]]:
+    """Las n palabras más frecuentes de un recuento (empates en orden alfabético)."""
+    return heapq.nsmallest(n, counts.items(), key=by_frequency)
+
+
+class TopKSummary:
+    """
+    Resumen de las palabras más frecuentes con cotas de error.
+
+    Args:
+        capacity (int): Número máximo de palabras guardadas.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.upper = {}  # palabra -> cota superior de su frecuencia
+        self.lower = {}  # palabra -> cota inferior de su frecuencia
+        self.floor = 0  # cota de la frecuencia de cualquier palabra ausente
+
+    @classmethod
+    def from_counter(cls, counter: Counter, capacity: int) -> "TopKSummary":
+        """Resume recuentos exactos: las cotas de las palabras guardadas coinciden."""
+        summary = cls(capacity)
+        summary.upper, summary.floor = _keep_largest(counter, capacity)
+        summary.lower = dict(summary.upper)
+        return summary
+
+    def merge(self, other: "TopKSummary") -> "TopKSummary":
+        """Devuelve un resumen de la unión de los textos resumidos por ambos."""
+        merged = TopKSummary(self.capacity)
+        upper = {
+            word: self.upper.get(word, self.floor) + other.upper.get(word, other.floor)
+            for word in self.upper.keys() | other.upper.keys()
+        }
+
+        merged.upper, dropped = _keep_largest(upper, self.capacity)
+        merged.floor = max(self.floor + other.floor, dropped)
+        merged.lower = {
+            word: self.lower.get(word, 0) + other.lower.get(word, 0)
+            for word in merged.upper
+        }
+        return merged
+
+    def most_common(self, n: int) -> list[tuple[str, int]]:
+        """Las n palabras con mayor cota superior, con esa cota como frecuencia."""
+        return most_common(self.upper, n)
+
+    def is_exact(self, n: int) -> bool:
+        """
+        Comprueba si most_common(n) es seguro exacto: sus frecuencias no tienen
+        error y ninguna otra palabra puede superar a la última de ellas.
+        """
+        top = self.most_common(n + 1)
+        rest = top.pop()[1] if len(top) > n else 0
+        if any(self.lower[word] != count for word, count in top):
+            return False
+        if len(top) < n:
+            # Solo es exacto si no se ha descartado ninguna palabra
+            return self.floor == 0
+        return top[-1][1] >= max(rest, self.floor)
+
+
+def _keep_largest(counts: dict, capacity: int) -> tuple[dict, int]:
+    """
+    Se queda con las `capacity` palabras de mayor frecuencia (con el mismo orden
+    que most_common). Devuelve también la mayor frecuencia descartada (0 si
+    ninguna).
+    """
+    top = most_common(counts, capacity + 1)
+    dropped = top.pop()[1] if len(top) > capacity else 0
+    return dict(top), dropped
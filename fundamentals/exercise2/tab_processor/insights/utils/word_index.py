@@ -0,0 +1,170 @@
+"""
+Índice persistente de frecuencias de palabras (SQLite).
+
+Guarda el recuento de palabras de cada archivo de letras, junto con su artista,
+su mtime y su tamaño. Al cambiar una canción solo se recalcula su archivo: se
+resta su contribución anterior y se suma la nueva. Los totales por artista y
+globales se mantienen en sus propias tablas, así que los tops se consultan al
+momento sin volver a leer las letras.
+
+Tablas:
+    files(path, artist, mtime_ns, size)
+    counts(path, word, count)                     recuento por archivo
+    artist_counts(artist, word, count)            suma por artista
+    word_counts(word, count)                      suma global
+"""
+
+import sqlite3
+from collections import Counter
+from pathlib import Path
+
+INDEX_FILE = "word_index.sqlite"
+
+
+class WordIndex:
+    """
+    Índice de frecuencias de palabras por archivo, artista y global.
+
+    Args:
+        path (str | Path): Ubicación de la base de datos SQLite.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                artist TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS counts (
+                path TEXT NOT NULL,
+                word TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (path, word)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS artist_counts (
+                artist TEXT NOT NULL,
+                word TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (artist, word)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS word_counts (
+                word TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def known_files(self) -> dict[str, tuple[str, int, int]]:
+        """Devuelve {path: (artist, mtime_ns, size)} de todos los archivos indexados."""
+        rows = self._conn.execute("SELECT path, artist, mtime_ns, size FROM files")
+        return {path: (artist, mtime_ns, size) for path, artist, mtime_ns, size in rows}
+
+    def replace_file(
+        self, path: str, artist: str, mtime_ns: int, size: int, counter: Counter
+    ):
+        """Sustituye la contribución de un archivo por sus nuevos recuentos."""
+        self.remove_file(path)
+        self._conn.execute(
+            "INSERT INTO files VALUES (?, ?, ?, ?)",
+            (path, artist, mtime_ns, size),
+        )
+        items = list(counter.items())
+        self._conn.executemany(
+            "INSERT INTO counts VALUES (?, ?, ?)",
+            [(path, word, count) for word, count in items],
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO artist_counts VALUES (?, ?, ?)
+            ON CONFLICT (artist, word) DO UPDATE SET count = count + excluded.count
+            """,
+            [(artist, word, count) for word, count in items],
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO word_counts VALUES (?, ?)
+            ON CONFLICT (word) DO UPDATE SET count = count + excluded.count
+            """,
+            items,
+        )
+
+    def remove_file(self, path: str):
+        """Resta la contribución de un archivo y lo elimina del índice."""
+        row = self._conn.execute(
+            "SELECT artist FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return
+        artist = row[0]
+        items = self._conn.execute(
+            "SELECT word, count FROM counts WHERE path = ?", (path,)
+        ).fetchall()
+        self._conn.executemany(
+            "UPDATE artist_counts SET count = count - ? WHERE artist = ? AND word = ?",
+            [(count, artist, word) for word, count in items],
+        )
+        self._conn.executemany(
+            "UPDATE word_counts SET count = count - ? WHERE word = ?",
+            [(count, word) for word, count in items],
+        )
+        self._conn.execute(
+            "DELETE FROM artist_counts WHERE artist = ? AND count <= 0", (artist,)
+        )
+        self._conn.execute("DELETE FROM word_counts WHERE count <= 0")
+        self._conn.execute("DELETE FROM counts WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def commit(self):
+        self._conn.commit()
+
+    def top_words(self, n: int, artists: list[str] = None) -> list[tuple[str, int]]:
+        """
+        Las n palabras más frecuentes de todo el corpus o, si se indica, solo de
+        un conjunto de artistas. Los empates se ordenan alfabéticamente.
+        """
+        if not artists:
+            return self._conn.execute(
+                "SELECT word, count FROM word_counts ORDER BY count DESC, word LIMIT ?",
+                (n,),
+            ).fetchall()
+        placeholders = ", ".join("?" for _ in artists)
+        return self._conn.execute(
+            f"""
+            SELECT word, SUM(count) AS total FROM artist_counts
+            WHERE artist IN ({placeholders})
+            GROUP BY word ORDER BY total DESC, word LIMIT ?
+            """,
+            (*artists, n),
+        ).fetchall()
+
+    def top_words_by_artist(self, n: int) -> dict[str, list[tuple[str, int]]]:
+        """Las n palabras más frecuentes de cada artista, en una sola consulta."""
+        rows = self._conn.execute(
+            """
+            SELECT artist, word, count FROM (
+                SELECT artist, word, count, ROW_NUMBER() OVER (
+                    PARTITION BY artist ORDER BY count DESC, word
+                ) AS position
+                FROM artist_counts
+            )
+            WHERE position <= ?
+            ORDER BY artist, position
+            """,
+            (n,),
+        )
+        top_words = {}
+        for artist, word, count in rows:
+            top_words.setdefault(artist, []).append((word, count))
+        return top_words
+
+    def close(self):
+        self._conn.close()
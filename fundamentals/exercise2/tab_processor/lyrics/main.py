@@ -1,19 +1,24 @@
 import os
-import re
+import sys
+import time
 import click
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-BASE_DIR = "./files"
-OK_DIR = os.path.join(BASE_DIR, "validations", "ok")
+# Shared modules (common/) live in tab_processor, the parent of this stage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from common.discovery import iter_files, batched
+from common.chords import remove_chords
+from common.validations import iter_verdicts, MANIFEST_FILE, OK
 
-def list_txt_files_recursive(path: str):
-    """Return all .txt files under a directory (recursively)."""
-    txt_files = []
-    for root, _, files in os.walk(path):
-        for name in files:
-            if name.lower().endswith(".txt"):
-                txt_files.append(os.path.join(root, name))
-    return txt_files
+BASE_DIR = "./files"
+OK_DIR = os.path.join(BASE_DIR, "validations", "ok")
+# Separate tree, so the lyrics are never taken for validated tabs
+LYRICS_DIR = os.path.join(BASE_DIR, "lyrics")
+LYRICS_SUFFIX = "_lyrics"
+SHARD_SIZE = 100  # Files handed to a worker at a time
+PROGRESS_EVERY = 5  # Seconds between progress lines
 
 
 def remove_chords_from_line(line: str) -> str:
@@ -21,72 +26,153 @@ def remove_chords_from_line(line: str) -> str:
     Remove chord tokens from a line.
 
     Chords are patterns like:
-    A, Am, A#, Bb, Fmaj7, Gm7, etc.
+    A, Am, A#, Bb, Fmaj7, Gm7, etc. (grammar shared with the validator,
+    see common/chords.py). Lines repeat a lot in tabs, so results are memoized.
     """
-    # Pattern for common chord formats (uppercase letters)
-    chord_pattern = r"\b([A-G](?:#|b)?(?:maj|min|m|sus|dim|aug)?\d*)\b"
+    return remove_chords(line)
+
+
+def process_file(input_path: str, output_path: str) -> int:
+    """
+    Write the content of a file without chords to output_path.
+
+    The file is streamed line by line, so memory use does not depend
+    on its size. Return the number of lines written.
+    """
+    count = 0
+    with open(input_path, "r", encoding="utf-8", errors="ignore") as f, open(
+        output_path, "w", encoding="utf-8"
+    ) as out_f:
+        for line in f:
+            # Remove newline for processing; keep empty lines to preserve structure
+            out_f.write(remove_chords_from_line(line.rstrip("\n")) + "\n")
+            count += 1
+        if not count:
+            out_f.write("\n")
+    return count
+
 
-    # Remove chords
-    without_chords = re.sub(chord_pattern, "", line)
+def output_path_for(rel_path: str) -> str:
+    """Return the lyrics file of a song: LYRICS_DIR/<dir>/<name>_lyrics.txt."""
+    name, ext = os.path.splitext(rel_path)
+    return os.path.join(LYRICS_DIR, f"{name}{LYRICS_SUFFIX}{ext}")
 
-    # Remove leftover double spaces
-    without_chords = re.sub(r"\s{2,}", " ", without_chords)
 
-    # Strip spaces at start/end
-    return without_chords.strip()
+def is_up_to_date(input_path: str, output_path: str) -> bool:
+    """Check if the lyrics exist and are not older than their source."""
+    try:
+        return os.stat(output_path).st_mtime_ns >= os.stat(input_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
 
 
-def process_file(input_path: str) -> str:
-    """Read a file and return its content without chords."""
-    with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
-        lines = f.readlines()
+def process_shard(files: list[tuple[str, str]], force: bool = False) -> tuple[int, int]:
+    """
+    Generate the lyrics of a group of (input file, relative path) pairs.
+
+    Lyrics newer than their source are kept unless force is set. Runs in a
+    worker process when --workers > 1. Return the number of files generated
+    and the number of files that were up to date.
+    """
+    generated = up_to_date = 0
+    for path, rel_path in files:
+        output_path = output_path_for(rel_path)
+        if not force and is_up_to_date(path, output_path):
+            up_to_date += 1
+            continue
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        process_file(path, output_path)
+        generated += 1
+    return generated, up_to_date
+
+
+def list_validated_files() -> list[tuple[str, str]]:
+    """
+    Return (input file, relative path) pairs for the validated tabs.
+
+    If the validator wrote its manifest, the songs are read from the cleaned
+    tree (the validator may not have copied them into ok/). Otherwise the
+    ok directory is scanned, leaving out the *_lyrics.txt files that older
+    versions of this stage wrote there.
+    """
+    if os.path.isfile(MANIFEST_FILE):
+        return [
+            (entry["source"], entry["file"])
+            for entry in iter_verdicts(MANIFEST_FILE, status=OK)
+        ]
 
-    cleaned_lines = []
-    for line in lines:
-        # Remove newline for processing
-        text = line.rstrip("\n")
-        new_text = remove_chords_from_line(text)
+    return [
+        (path, os.path.relpath(path, OK_DIR))
+        for path in iter_files(OK_DIR, suffixes=(".txt",))
+        if not path.endswith(f"{LYRICS_SUFFIX}.txt")
+    ]
 
-        # Keep empty lines to preserve structure
-        cleaned_lines.append(new_text)
 
-    # Join back with newline
-    return "\n".join(cleaned_lines)
+def remove_stale_lyrics(expected: set[str]) -> int:
+    """Delete the lyrics of songs that are no longer validated. Return how many."""
+    removed = 0
+    for path in iter_files(LYRICS_DIR, suffixes=(f"{LYRICS_SUFFIX}.txt",)):
+        if os.path.normpath(path) not in expected:
+            os.remove(path)
+            removed += 1
+    return removed
 
 
 @click.command()
-def main():
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes generating lyrics in parallel.",
+)
+@click.option(
+    "--force",
+    "-f",
+    is_flag=True,
+    default=False,
+    help="Generate all the lyrics again, even if they are newer than their source.",
+)
+def main(workers, force):
     """
     Generate lyrics-only versions of validated tabs.
 
-    For each file in ./files/validations/ok,
-    create a new file <name>_lyrics.txt in the same directory.
+    For each validated file (listed in the validator's manifest, or found in
+    ./files/validations/ok), create a file <name>_lyrics.txt with the same
+    relative path under ./files/lyrics. Lyrics newer than their source are
+    not generated again, and lyrics of songs no longer validated are removed.
     """
-    if not os.path.exists(OK_DIR):
+    if not os.path.exists(OK_DIR) and not os.path.isfile(MANIFEST_FILE):
         print(f"Directory not found: {OK_DIR}")
         return
 
-    files = list_txt_files_recursive(OK_DIR)
+    files = list_validated_files()
     print(f"Found {len(files)} validated files to process.\n")
 
-    count = 0
-    for path in files:
-        dir_name, filename = os.path.split(path)
-        name, ext = os.path.splitext(filename)
-
-        # Output file: same directory, *_lyrics.txt
-        output_path = os.path.join(dir_name, f"{name}_lyrics{ext}")
-
-        lyrics_text = process_file(path)
-
-        with open(output_path, "w", encoding="utf-8") as out_f:
-            out_f.write(lyrics_text + "\n")
-
-        count += 1
-        print(f"[{count}] {output_path} CREATED")
+    generated = up_to_date = 0
+    last_progress = time.monotonic()
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    results = (executor.map if executor else map)(
+        partial(process_shard, force=force), batched(files, SHARD_SIZE)
+    )
+    try:
+        for shard_generated, shard_up_to_date in results:
+            generated += shard_generated
+            up_to_date += shard_up_to_date
+            if time.monotonic() - last_progress >= PROGRESS_EVERY:
+                last_progress = time.monotonic()
+                print(f"Progress: {generated + up_to_date}/{len(files)} files")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    expected = {os.path.normpath(output_path_for(rel_path)) for _, rel_path in files}
+    removed = remove_stale_lyrics(expected)
 
     print("\nLyrics generation finished.")
-    print(f"Total files processed: {count}")
+    print(f"Total files processed: {generated}")
+    print(f"Already up to date: {up_to_date}, removed: {removed}")
 
 
 if __name__ == "__main__":
@@ -59,6 +59,7 @@ def main():
     run_step("VALIDATOR", [sys.executable, path("tab_validator", "main.py")])
     run_step("RESULTS",   [sys.executable, path("results", "main.py")])
     run_step("LYRICS",    [sys.executable, path("lyrics", "main.py")])
+    run_step("INDEXER",   [sys.executable, path("indexer", "main.py"), "build"])
     run_step("INSIGHTS",  [sys.executable, path("insights", "main.py")])
 
     logger.info("Pipeline execution finished successfully")
@@ -1,8 +1,14 @@
 # tab_processor/results/main.py
 
 import os
+import sys
 import click
 
+# Shared modules (common/) live in tab_processor, the parent of this stage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.discovery import count_files
+
 # Base directory for all generated files
 BASE_DIR = "./files"
 
@@ -12,18 +18,9 @@ OUTPUT_DIRS = {
     "cleaned_songs": os.path.join(BASE_DIR, "cleaned"),              # cleaner output
     "validator_ok": os.path.join(BASE_DIR, "validations", "ok"),     # valid tabs
     "validator_ko": os.path.join(BASE_DIR, "validations", "ko"),     # invalid tabs
+    "lyrics": os.path.join(BASE_DIR, "lyrics"),                      # lyrics output
 }
 
-def count_files(path: str) -> int:
-    """
-    Count how many files we have in a directory (recursively).
-    Only counts regular files, not folders.
-    """
-    total_files = 0
-    for root, _, files in os.walk(path):
-        total_files += len(files)
-    return total_files
-
 @click.command()
 def main():
     """Print a small summary of how many files we have for each output."""
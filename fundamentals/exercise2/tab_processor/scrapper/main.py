@@ -1,8 +1,13 @@
+import os
 import datetime
 import click
 import logging as log
 import utils.files as files
 import utils.songs as songs
+import utils.session as session
+import utils.http_cache as http_cache
+import utils.metadata as metadata
+from pathlib import Path
 
 # -- Configuration ---
 OUTPUT_DIRECTORY = "./files/"
@@ -40,13 +45,63 @@ log.basicConfig(
     default=False,
     help="Regenerates the catalog.",
 )
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Merge changes into the existing catalog instead of rebuilding it (implies -uc).",
+)
+@click.option(
+    "-e",
+    "--enrich",
+    is_flag=True,
+    default=False,
+    help="Adds MusicBrainz genres and albums to the artists in the catalog.",
+)
 @click.option(
     "--start_char", "-sc", default="a", help="Starting letter for updating the catalog."
 )
 @click.option(
     "--end_char", "-ec", default="z", help="Ending letter for updating the catalog."
 )
-def main(reset, update_catalog, start_char, end_char):
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of songs downloaded concurrently.",
+)
+@click.option(
+    "--rps",
+    default=songs.DEFAULT_RPS,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Maximum requests per second sent to each host.",
+)
+@click.option(
+    "--batch_writes",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Write downloaded songs in batches of this many files (0 writes each one at once).",
+)
+@click.option(
+    "--pool_size",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Keep-alive connections per host. Defaults to the number of workers (minimum 10).",
+)
+def main(
+    reset,
+    update_catalog,
+    incremental,
+    enrich,
+    start_char,
+    end_char,
+    workers,
+    rps,
+    batch_writes,
+    pool_size,
+):
     """Main function to run the scrapper. Can reset data, update catalog, or fetch songs."""
     print("Starting scrapper...")
 
@@ -54,27 +109,74 @@ def main(reset, update_catalog, start_char, end_char):
     start_time = datetime.datetime.now()
     log.info(f"Scrapper started at {start_time}")
 
+    # Shared HTTP session: one pooled connection per worker at least
+    session.configure(pool_size=pool_size or max(workers, session.DEFAULT_POOL_SIZE))
+
     # Reset data if required
     if reset:
         log.info("Remove all downloaded files. Fresh start...")
         files.delete(OUTPUT_DIRECTORY)
 
-    # Update catalog if required
-    if update_catalog or not files.check_file_exists(OUTPUT_DIRECTORY, "catalog.json"):
+    # Catalog pages are revalidated with conditional GETs instead of re-downloaded
+    http_cache.configure(os.path.join(OUTPUT_DIRECTORY, http_cache.CACHE_FILE))
+
+    catalog_path = Path(OUTPUT_DIRECTORY, songs.CATALOG_FILE)
+
+    # Convert the old monolithic catalog.json to JSON Lines if needed
+    legacy_path = Path(OUTPUT_DIRECTORY, songs.LEGACY_CATALOG_FILE)
+    if legacy_path.exists() and not catalog_path.exists():
+        log.info(f"Converting {legacy_path} to {catalog_path}...")
+        files.convert_json_to_jsonl(legacy_path, catalog_path)
+
+    # Update catalog if required (an incremental update is still a catalog update,
+    # and a missing catalog is always built)
+    catalog_exists = catalog_path.exists()
+    update_catalog = update_catalog or incremental or not catalog_exists
+    if update_catalog and incremental and catalog_exists:
+        log.info("Updating catalog incrementally...")
+        catalog, changes = songs.update_catalog(
+            OUTPUT_DIRECTORY,
+            list(files.iter_jsonl(catalog_path)),
+            start_char=start_char,
+            end_char=end_char,
+        )
+        files.save_to_jsonl(catalog, OUTPUT_DIRECTORY, songs.CATALOG_FILE)
+        files.save_to_json(changes, OUTPUT_DIRECTORY, "catalog_changes.json")
+        log.info("Catalog updated.")
+    elif update_catalog:
         log.info("Updating catalog...")
-        catalog = songs.get_catalog(
+        # Each artist is written as soon as it is scraped
+        catalog = songs.iter_catalog(
             OUTPUT_DIRECTORY,
             start_char=start_char,
             end_char=end_char,
         )
-        files.save_to_json(catalog, OUTPUT_DIRECTORY, "catalog.json")
+        files.save_to_jsonl(catalog, OUTPUT_DIRECTORY, songs.CATALOG_FILE)
         log.info("Catalog updated.")
 
+    # Enrich catalog with MusicBrainz metadata if required (after updating it)
+    if enrich:
+        log.info("Enriching catalog with MusicBrainz metadata...")
+        catalog = list(files.iter_jsonl(catalog_path))
+        metadata.enrich_catalog(
+            catalog, os.path.join(OUTPUT_DIRECTORY, metadata.CACHE_FILE)
+        )
+        files.save_to_jsonl(catalog, OUTPUT_DIRECTORY, songs.CATALOG_FILE)
+        log.info("Catalog enriched.")
+
+    # Songs are downloaded in a run of their own
+    if update_catalog or enrich:
         return 200
 
     # Get songs lyrics
     log.info(f"Starting to download lyrics...")
-    songs.get_songs(OUTPUT_DIRECTORY, version=SONG_VERSION)
+    songs.get_songs(
+        OUTPUT_DIRECTORY,
+        version=SONG_VERSION,
+        workers=workers,
+        rps=rps,
+        batch_writes=batch_writes,
+    )
 
     duration = datetime.datetime.now() - start_time
     log.info(f"Total duration: {duration}")
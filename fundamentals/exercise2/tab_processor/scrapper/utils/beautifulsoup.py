@@ -1,19 +1,111 @@
 import requests
 import logging as log
-from bs4 import BeautifulSoup
+import utils.session as session
+import utils.http_cache as http_cache
+from dataclasses import dataclass
+from bs4 import BeautifulSoup, SoupStrainer
 
+# lxml is much faster than the pure-Python parser; fall back to it if lxml is not installed
+try:
+    import lxml  # noqa: F401
 
-def get_soup(url) -> BeautifulSoup | None:
-    """Fetches a URL and returns a BeautifulSoup object.
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+# Targeted extractors: only the nodes each caller needs are materialized
+ONLY_PRE = SoupStrainer("pre")  # Song pages: the tab lives in <pre> blocks
+ONLY_UL = SoupStrainer("ul")  # Artist indexes: anchors inside the first <ul>
+ONLY_LI = SoupStrainer("li")  # Artist pages: song links are "li > a"
+
+
+# --- Data Structures ---
+@dataclass
+class Page:
+    """The HTML of a fetched URL.
+
+    Attributes:
+        url (str): The fetched URL.
+        text (str): The HTML body (from the server or from the cache).
+        status (int): The HTTP status code returned by the server.
+        not_modified (bool): True if the server answered 304 and `text` comes from the cache.
+    """
+
+    url: str
+    text: str
+    status: int = 200
+    not_modified: bool = False
+
+
+def fetch_page(url, use_cache: bool = True) -> Page:
+    """Fetches a URL through the shared pooled session.
+    If the response cache is enabled, a conditional GET (If-None-Match / If-Modified-Since)
+    is sent and the cached body is returned when the server answers 304 Not Modified.
+    Args:
+        url (str): The URL to fetch.
+        use_cache (bool, optional): Whether to use the response cache. Defaults to True.
+    Returns:
+        Page: The fetched page.
+    Raises:
+        requests.exceptions.RequestException: If the request fails or returns 4xx/5xx.
+    """
+    cache = http_cache.get_cache() if use_cache else None
+    cached = cache.get(url) if cache else None
+
+    headers = cached.conditional_headers() if cached else {}
+    response = session.get(url, headers=headers)
+
+    if cached and response.status_code == 304:
+        log.info(f"Not modified, using cached copy of {url}")
+        cache.touch(url)
+        return Page(url, cached.body, response.status_code, not_modified=True)
+
+    response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+
+    if cache:
+        cache.put(
+            url,
+            response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    return Page(url, response.text, response.status_code)
+
+
+def parse(
+    html: str, parse_only: SoupStrainer = None, parser: str = DEFAULT_PARSER
+) -> BeautifulSoup:
+    """Parses an HTML string into a BeautifulSoup object.
+    Args:
+        html (str): The HTML to parse.
+        parse_only (SoupStrainer, optional): Only build the tags matching this strainer.
+                                             Defaults to None (whole document).
+        parser (str, optional): BeautifulSoup parser to use. Defaults to DEFAULT_PARSER.
+    Returns:
+        BeautifulSoup: The parsed document.
+    """
+    return BeautifulSoup(html, parser, parse_only=parse_only)
+
+
+def get_soup(
+    url,
+    parse_only: SoupStrainer = None,
+    parser: str = DEFAULT_PARSER,
+    use_cache: bool = True,
+) -> BeautifulSoup | None:
+    """Fetches a URL (see fetch_page) and returns a BeautifulSoup object.
     Args:
         url (str): The URL to fetch.
+        parse_only (SoupStrainer, optional): Only build the tags matching this strainer.
+                                             Defaults to None (whole document).
+        parser (str, optional): BeautifulSoup parser to use. Defaults to DEFAULT_PARSER.
+        use_cache (bool, optional): Whether to use the response cache. Defaults to True.
     Returns:
         BeautifulSoup | None: A BeautifulSoup object if the request is successful, None otherwise.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-        return BeautifulSoup(response.text, "html.parser")
+        page = fetch_page(url, use_cache=use_cache)
+        return parse(page.text, parse_only=parse_only, parser=parser)
     except requests.exceptions.RequestException as e:
         log.error(f"Error fetching {url}: {e}")
         return None
@@ -1,16 +1,13 @@
-import musicbrainzngs
 import utils.files as files
-from dataclasses import dataclass, asdict, field
+import utils.metadata as metadata
+from dataclasses import dataclass, field
 from pathlib import Path
 
-# --- Config ---
-
-# Initialize MusicBrainz client
-musicbrainzngs.set_useragent("MyMusicApp", "1.0", "myemail@example.com")
-
 
 # --- Data Structures ---
-@dataclass
+# Both records use __slots__ (no per-instance __dict__), which matters with hundreds of
+# thousands of songs, and build their dicts directly instead of deep-copying with asdict.
+@dataclass(slots=True)
 class Song:
     """Represents a song with its metadata.
 
@@ -36,22 +33,28 @@ class Song:
         self.id = Song._id_counter
         Song._id_counter += 1
 
-        self.lyrics_path = files.normalize_relative_path(self.lyrics_path)
+        if self.lyrics_path:
+            self.lyrics_path = files.normalize_relative_path(str(self.lyrics_path))
 
     def to_dict(self):
-        return asdict(self)
+        """Converts the Song object to a JSON-serializable dictionary."""
+        return {
+            "id": self.id,
+            "song_title": self.song_title,
+            "song_url": self.song_url,
+            "genre": self.genre,
+            "lyrics_path": self.lyrics_path,
+        }
 
     @staticmethod
     def from_dict(data):
-        # Remove id from data if present (it will be auto-generated)
-        data_copy = data.copy()
-        data_copy.pop("id", None)
-
-        # Ensure lyrics_path is a Path object if it exists
-        if "lyrics_path" in data_copy and data_copy["lyrics_path"]:
-            data_copy["lyrics_path"] = Path(data_copy["lyrics_path"])
-
-        song = Song(**data_copy)
+        """Creates a Song object from a dictionary. The id is auto-generated."""
+        song = Song(
+            song_title=data["song_title"],
+            song_url=data["song_url"],
+            genre=data.get("genre", ""),
+            lyrics_path=data.get("lyrics_path"),
+        )
 
         # If the original data had an ID and it's higher than our counter,
         # update the counter to avoid conflicts
@@ -66,7 +69,7 @@ class Song:
         cls._id_counter = start_value
 
 
-@dataclass
+@dataclass(slots=True)
 class Artist:
     """Represents an artist with their name, URL, and a list of their songs.
 
@@ -93,59 +96,48 @@ class Artist:
 
     def __post_init__(self):
         """Automatically assign an incremental ID after initialization.
-        Also fetches metadata from MusicBrainz.
+        Metadata is not fetched here: see metadata.enrich_catalog.
         """
         self.id = Artist._id_counter
         Artist._id_counter += 1
 
-        # Fetch metadata automatically from MusicBrainz
-        self.fetch_metadata()
-
     def to_dict(self):
         """Converts the Artist object to a dictionary, including its nested songs."""
-        data = asdict(self)
+        data = self.to_dict_no_songs()
         data["songs"] = [song.to_dict() for song in self.songs]
         return data
 
     def to_dict_no_songs(self):
-        """Converts the Artist object to a dictionary, excluding its nested songs."""
-        data = asdict(self)
-        data.pop("songs", None)
-        return data
+        """Converts the Artist object to a dictionary, excluding its nested songs.
+        The genres and albums lists are shared with the object, not copied.
+        """
+        return {
+            "id": self.id,
+            "name": self.name,
+            "url": self.url,
+            "genres": self.genres,
+            "albums": self.albums,
+        }
 
     def fetch_metadata(self):
-        """Fetch artist metadata like tags (genres), albums, and description."""
+        """Fetch artist metadata like tags (genres) and albums from MusicBrainz."""
         try:
-            results = musicbrainzngs.search_artists(artist=self.name, limit=1)
-            if results["artist-list"]:
-                artist_data = results["artist-list"][0]
-                mbid = artist_data["id"]  # MusicBrainz ID
-
-                # Get detailed info: tags (genres), releases (albums)
-                details = musicbrainzngs.get_artist_by_id(
-                    mbid, includes=["tags", "releases"]
-                )
-
-                # Genres/tags
-                if "tag-list" in details["artist"]:
-                    self.genres = [tag["name"] for tag in details["artist"]["tag-list"]]
-
-                # Albums/releases
-                if "release-list" in details:
-                    self.albums = list({r["title"] for r in details["release-list"]})
-
+            data = metadata.fetch_artist_metadata(self.name)
+            self.genres = data["genres"]
+            self.albums = data["albums"]
         except Exception as e:
             print(f"Error fetching data for {self.name}: {e}")
 
     @staticmethod
     def from_dict(data):
         """Creates an Artist object from a dictionary, reconstructing nested songs."""
-        data_copy = data.copy()
-        data_copy.pop("id", None)  # Remove id (will be auto-generated)
-
-        songs_data = data_copy.pop("songs", [])
-        artist = Artist(**data_copy)
-        artist.songs = [Song.from_dict(s_data) for s_data in songs_data]
+        artist = Artist(
+            name=data["name"],
+            url=data["url"],
+            genres=data.get("genres", []),
+            albums=data.get("albums", []),
+            songs=[Song.from_dict(s_data) for s_data in data.get("songs", [])],
+        )
 
         # If the original data had an ID and it's higher than our counter,
         # update the counter to avoid conflicts
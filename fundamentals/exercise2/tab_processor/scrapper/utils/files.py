@@ -1,10 +1,13 @@
 import os
 import sys
+import uuid
+import threading
 import logging as log
 import json
+from itertools import groupby
 from pathlib import Path
 from attrs import asdict
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 
 def normalize_relative_path(path):
@@ -31,20 +34,55 @@ def check_file_exists(path: str, filename: str = None) -> bool:
         return os.path.isfile(os.path.join(path, filename))
 
 
+# Directories already created by this process, so each one costs a single makedirs call
+_created_dirs = set()
+_dirs_lock = threading.Lock()
+
+
+def ensure_dir(dir_path: str):
+    """Creates a directory (and its parents) unless this process already did it."""
+    if not dir_path or dir_path in _created_dirs:
+        return
+    os.makedirs(dir_path, exist_ok=True)
+    with _dirs_lock:
+        _created_dirs.add(dir_path)
+
+
 def safe_open(file_path, mode="w", encoding="utf-8"):
     """Open a file for writing, creating the directory if necessary."""
-    dir_path = os.path.dirname(file_path)
-    if dir_path:  # Check if dir_path is not empty
-        os.makedirs(dir_path, exist_ok=True)
+    ensure_dir(os.path.dirname(file_path))
     try:
         return open(file_path, mode, encoding=encoding)
     except Exception as e:
         print(f"Failed to open {file_path}: {e}")
 
 
+def atomic_write(file_path: str, text: str, encoding: str = "utf-8"):
+    """
+    Writes a string to a file atomically: the text goes to a temporary file in the same
+    directory which is then renamed over the target. A crash never leaves a truncated file
+    behind, so the skip-if-exists logic can trust any file it finds.
+    Args:
+        file_path (str): The file to write.
+        text (str): The content.
+        encoding (str, optional): The file encoding. Defaults to "utf-8".
+    """
+    ensure_dir(os.path.dirname(file_path))
+    # Temporary name does not end with .txt, so no pipeline stage ever picks it up
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "w", encoding=encoding) as file:
+            file.write(text)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def write_string_to_file(path: str, file_name: str = None, text: str = ""):
     """
-    Writes a string to a file in the specified directory.
+    Writes a string to a file in the specified directory, atomically (see atomic_write).
     If file_name is None, writes to the path directly.
     Args:
         directory (str): The directory where the file will be saved.
@@ -53,17 +91,130 @@ def write_string_to_file(path: str, file_name: str = None, text: str = ""):
     Returns:
         None
     """
-    if file_name is None:
-        file_path = path
-    else:
-        # Ensure the directory exists
-        if not os.path.exists(path):
-            os.makedirs(path)
-        file_path = os.path.join(path, file_name)
+    file_path = path if file_name is None else os.path.join(path, file_name)
+    atomic_write(file_path, text)
+
+
+# Relative opens and renames (openat/renameat) are not available everywhere, e.g. Windows
+_DIR_FD_SUPPORTED = os.open in os.supports_dir_fd
+
+
+class BufferedWriter:
+    """
+    Groups small file writes and flushes them in batches, directory by directory.
+    For each directory of a batch, the directory is created (if needed) and opened once;
+    its files are then written to temporary names and renamed relative to that handle,
+    so only the file name is looked up (not the whole path, which costs a round trip
+    per component on network file systems), and a single fsync of the directory makes
+    all its renames durable. Every file is still written atomically.
+    An optional callback per file runs once the file is on disk, so bookkeeping (e.g. the
+    download journal) never gets ahead of the data. A file that cannot be written is
+    logged and left out without its callback (so it is downloaded again next time),
+    and the rest of the batch is still written.
+    Thread-safe; use it as a context manager so the last batch is flushed.
 
-    # Write the string to the file
-    with safe_open(file_path, "w", encoding="utf-8") as file:
-        file.write(text)
+    Args:
+        max_files (int, optional): Flush once this many files are pending. Defaults to 100.
+        max_bytes (int, optional): Flush once this many characters are pending. Defaults to 4 MB.
+    """
+
+    def __init__(self, max_files: int = 100, max_bytes: int = 4 * 1024 * 1024):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._pending = []
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+
+    def write(self, file_path: str, text: str, on_written: Callable = None):
+        """Queues a file write, flushing the batch if it is full."""
+        with self._lock:
+            self._pending.append((file_path, text, on_written))
+            self._pending_bytes += len(text)
+            if (
+                len(self._pending) >= self.max_files
+                or self._pending_bytes >= self.max_bytes
+            ):
+                self._flush_locked()
+
+    def flush(self):
+        """Writes every pending file."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        batch = sorted(self._pending, key=lambda item: item[0])
+        done = 0
+        try:
+            for directory, entries in groupby(
+                batch, key=lambda item: os.path.dirname(item[0])
+            ):
+                entries = list(entries)
+                self._write_directory(directory, entries)
+                done += len(entries)
+        finally:
+            # Only what was handled leaves the queue (e.g. on KeyboardInterrupt)
+            self._pending = batch[done:]
+            self._pending_bytes = sum(len(text) for _, text, _ in self._pending)
+
+    def _write_directory(self, directory: str, entries: list):
+        if not _DIR_FD_SUPPORTED:
+            for file_path, text, on_written in entries:
+                try:
+                    atomic_write(file_path, text)
+                except OSError as e:
+                    log.error(f"Failed to write {file_path}: {e}")
+                    continue
+                if on_written:
+                    on_written()
+            return
+
+        try:
+            ensure_dir(directory)
+            dir_fd = os.open(directory or ".", os.O_RDONLY)
+        except OSError as e:
+            for file_path, _, _ in entries:
+                log.error(f"Failed to write {file_path}: {e}")
+            return
+
+        written = []
+        try:
+            for file_path, text, on_written in entries:
+                try:
+                    _write_relative(dir_fd, os.path.basename(file_path), text)
+                except OSError as e:
+                    log.error(f"Failed to write {file_path}: {e}")
+                    continue
+                written.append(on_written)
+            # One fsync for all the renames of the directory
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        for on_written in written:
+            if on_written:
+                on_written()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def _write_relative(dir_fd: int, name: str, text: str, encoding: str = "utf-8"):
+    """atomic_write of a file given by its name inside an already open directory."""
+    tmp_name = f"{name}.{uuid.uuid4().hex}.tmp"
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+    try:
+        with open(fd, "w", encoding=encoding) as file:
+            file.write(text)
+        os.replace(tmp_name, name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except BaseException:
+        try:
+            os.remove(tmp_name, dir_fd=dir_fd)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 def delete(directory: str):
@@ -79,11 +230,44 @@ def delete(directory: str):
             elif item.is_dir():
                 delete(item)
         Path(directory).rmdir()
+        with _dirs_lock:
+            _created_dirs.clear()
         log.info(f"Deleted existing data directory: {directory}")
     else:
         log.info(f"No existing data directory found at: {directory}")
 
 
+def convert_to_serializable(obj):
+    """Recursively converts objects to JSON-serializable format."""
+
+    # Handle Path objects
+    if isinstance(obj, Path):
+        return str(obj)
+
+    # Handle objects with a to_dict method (like our dataclasses)
+    if hasattr(obj, "to_dict") and callable(obj.to_dict):
+        return obj.to_dict()
+
+    # Handle dataclasses that might not have to_dict
+    if hasattr(obj, "__dataclass_fields__"):
+        return asdict(obj)
+
+    # Handle lists and tuples
+    if isinstance(obj, (list, tuple)):
+        return [convert_to_serializable(item) for item in obj]
+
+    # Handle dictionaries
+    if isinstance(obj, dict):
+        return {key: convert_to_serializable(value) for key, value in obj.items()}
+
+    # Handle sets (convert to list for JSON)
+    if isinstance(obj, set):
+        return list(obj)
+
+    # Return as-is for basic types (str, int, float, bool, None)
+    return obj
+
+
 def save_to_json(
     data: Any,
     file_path: str,
@@ -106,36 +290,6 @@ def save_to_json(
         ensure_ascii (bool): If True, escapes non-ASCII characters (default: False to preserve Unicode).
     """
 
-    def convert_to_serializable(obj):
-        """Recursively converts objects to JSON-serializable format."""
-
-        # Handle Path objects
-        if isinstance(obj, Path):
-            return str(obj)
-
-        # Handle objects with a to_dict method (like our dataclasses)
-        if hasattr(obj, "to_dict") and callable(obj.to_dict):
-            return obj.to_dict()
-
-        # Handle dataclasses that might not have to_dict
-        if hasattr(obj, "__dataclass_fields__"):
-            return asdict(obj)
-
-        # Handle lists and tuples
-        if isinstance(obj, (list, tuple)):
-            return [convert_to_serializable(item) for item in obj]
-
-        # Handle dictionaries
-        if isinstance(obj, dict):
-            return {key: convert_to_serializable(value) for key, value in obj.items()}
-
-        # Handle sets (convert to list for JSON)
-        if isinstance(obj, set):
-            return list(obj)
-
-        # Return as-is for basic types (str, int, float, bool, None)
-        return obj
-
     # Convert the data to a JSON-serializable format
     serializable_data = convert_to_serializable(data)
 
@@ -233,3 +387,75 @@ def read_json(file_path: str) -> dict:
     except Exception as e:
         log.error(f"Error reading catalog from {file_path}: {e}")
         return {}
+
+
+def save_to_jsonl(items: Iterable, file_path: str, file_name: str) -> int:
+    """
+    Saves items to a JSON Lines file, one JSON object per line, consuming the iterable
+    as it goes so the whole collection never has to be in memory. The file is written to a
+    temporary name and renamed at the end, so readers never see a half-written file.
+
+    Args:
+        items (Iterable): The items to save (dicts, dataclasses, or objects with .to_dict()).
+        file_path (str): The directory of the output file.
+        file_name (str): The name of the output file.
+    Returns:
+        int: The number of items written.
+    """
+    file_path = Path(file_path, file_name)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(convert_to_serializable(item), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(tmp_path, file_path)
+
+    print(f"Successfully saved {count} items to {file_path}")
+    return count
+
+
+def iter_jsonl(file_path: Path) -> Iterator[dict]:
+    """
+    Lazily reads a JSON Lines file, yielding one object per line.
+    Invalid lines are logged and skipped.
+
+    Args:
+        file_path (Path): The full path to the JSON Lines file.
+    Yields:
+        dict: Each decoded object.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        print(f"JSON Lines file not found: {file_path}", file=sys.stderr)
+        return
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                log.error(f"Invalid JSON in {file_path} line {line_number}: {e}")
+
+
+def convert_json_to_jsonl(json_path: Path, jsonl_path: Path) -> int:
+    """
+    Converts a JSON file holding a list (like the old catalog.json) into JSON Lines.
+
+    Args:
+        json_path (Path): The JSON file to convert.
+        jsonl_path (Path): The JSON Lines file to create.
+    Returns:
+        int: The number of items converted, or -1 if the JSON file could not be loaded.
+    """
+    data = load_from_json(Path(json_path))
+    if not isinstance(data, list):
+        return -1
+
+    jsonl_path = Path(jsonl_path)
+    return save_to_jsonl(data, jsonl_path.parent, jsonl_path.name)
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import datetime
+import logging as log
+from dataclasses import dataclass
+from pathlib import Path
+
+# --- Configuration ---
+CACHE_FILE = "http_cache.sqlite"
+
+_cache = None
+
+
+# --- Data Structures ---
+@dataclass
+class CachedResponse:
+    """A response body stored in the cache together with its validators.
+
+    Attributes:
+        url (str): The requested URL (cache key).
+        body (str): The response text.
+        etag (str | None): Value of the ETag header, if the server sent one.
+        last_modified (str | None): Value of the Last-Modified header, if the server sent one.
+        fetched_at (str): ISO timestamp of the last time the server confirmed this body.
+    """
+
+    url: str
+    body: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: str = ""
+
+    def conditional_headers(self) -> dict:
+        """Headers for a conditional GET that revalidates this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """On-disk HTTP response cache backed by SQLite, keyed by URL.
+    A single connection is shared between threads and guarded by a lock.
+
+    Args:
+        path (str | Path): Location of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Returns the cached response for a URL, or None if it is not cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def put(self, url: str, body: str, etag: str = None, last_modified: str = None):
+        """Stores (or replaces) the response for a URL."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, _now()),
+            )
+            self._conn.commit()
+
+    def touch(self, url: str):
+        """Marks a cached response as revalidated (the server answered 304)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?", (_now(), url)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def configure(path):
+    """Enables the shared response cache at the given path."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = ResponseCache(path)
+    log.info(f"HTTP response cache enabled at {path}")
+
+
+def get_cache() -> ResponseCache | None:
+    """Returns the shared response cache, or None if caching is disabled."""
+    return _cache
@@ -0,0 +1,117 @@
+import sqlite3
+import hashlib
+import threading
+import datetime
+from pathlib import Path
+
+# --- Configuration ---
+JOURNAL_FILE = "downloads.sqlite"
+
+# Download statuses
+DONE = "done"  # Lyrics saved
+EMPTY = "empty"  # Page found but without any <pre> block
+NOT_FOUND = "not_found"  # 404 / 410: the song is gone
+FAILED = "failed"  # Network error, 5xx...: worth retrying
+
+# Songs with these statuses are never requested again
+FINAL_STATUSES = {DONE, EMPTY, NOT_FOUND}
+PERMANENT_HTTP_CODES = {404, 410}
+
+
+class DownloadJournal:
+    """Persistent journal of song downloads, backed by SQLite and keyed by song URL.
+    Every outcome is committed as soon as it is recorded (WAL mode), so after a crash
+    the journal reflects all the work done until then.
+
+    Args:
+        path (str | Path): Location of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS downloads (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                http_code INTEGER,
+                size INTEGER,
+                content_hash TEXT,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def statuses(self) -> dict[str, str]:
+        """Returns the status of every song in the journal, in a single query."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT url, status FROM downloads"))
+
+    def record(
+        self,
+        url: str,
+        status: str,
+        http_code: int = None,
+        text: str = None,
+    ):
+        """Records the outcome of a download.
+        Args:
+            url (str): The song URL.
+            status (str): One of DONE, EMPTY, NOT_FOUND or FAILED.
+            http_code (int, optional): The HTTP status code received, if any. Defaults to None.
+            text (str, optional): The saved lyrics, used for the size and content hash. Defaults to None.
+        """
+        size = content_hash = None
+        if text is not None:
+            data = text.encode("utf-8")
+            size = len(data)
+            content_hash = hashlib.sha1(data).hexdigest()
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO downloads (url, status, http_code, size, content_hash, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    status = excluded.status,
+                    http_code = excluded.http_code,
+                    size = excluded.size,
+                    content_hash = excluded.content_hash,
+                    attempts = attempts + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    url,
+                    status,
+                    http_code,
+                    size,
+                    content_hash,
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+            self._conn.commit()
+
+    def summary(self) -> dict[str, int]:
+        """Returns the number of songs for each status."""
+        with self._lock:
+            return dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM downloads GROUP BY status"
+                )
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def status_for_http_code(http_code: int | None) -> str:
+    """Maps a failed request's HTTP status code to a journal status."""
+    return NOT_FOUND if http_code in PERMANENT_HTTP_CODES else FAILED
@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import datetime
+import logging as log
+import musicbrainzngs
+from pathlib import Path
+
+# --- Config ---
+
+# Initialize MusicBrainz client
+musicbrainzngs.set_useragent("MyMusicApp", "1.0", "myemail@example.com")
+
+CACHE_FILE = "metadata_cache.sqlite"
+MUSICBRAINZ_RPS = 1.0  # MusicBrainz allows 1 request per second
+
+
+class MetadataCache:
+    """Local SQLite cache of MusicBrainz artist metadata, keyed by artist name and MBID.
+    Artists without a MusicBrainz match are cached too (with a NULL MBID) so they are
+    not looked up again.
+
+    Args:
+        path (str | Path): Location of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artists (
+                name TEXT PRIMARY KEY,
+                mbid TEXT,
+                genres TEXT NOT NULL,
+                albums TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artists_mbid ON artists (mbid)")
+        self._conn.commit()
+
+    def get(self, name: str) -> dict | None:
+        """Returns the cached metadata for an artist name, or None if not cached."""
+        row = self._conn.execute(
+            "SELECT mbid, genres, albums FROM artists WHERE name = ?", (_key(name),)
+        ).fetchone()
+        return _to_metadata(row) if row else None
+
+    def get_by_mbid(self, mbid: str) -> dict | None:
+        """Returns the cached metadata for a MusicBrainz ID, or None if not cached."""
+        row = self._conn.execute(
+            "SELECT mbid, genres, albums FROM artists WHERE mbid = ?", (mbid,)
+        ).fetchone()
+        return _to_metadata(row) if row else None
+
+    def put(self, name: str, metadata: dict):
+        """Stores the metadata for an artist name."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO artists VALUES (?, ?, ?, ?, ?)",
+            (
+                _key(name),
+                metadata["mbid"],
+                json.dumps(metadata["genres"], ensure_ascii=False),
+                json.dumps(metadata["albums"], ensure_ascii=False),
+                datetime.datetime.now().isoformat(timespec="seconds"),
+            ),
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def _key(name: str) -> str:
+    return name.strip().lower()
+
+
+def _to_metadata(row) -> dict:
+    mbid, genres, albums = row
+    return {"mbid": mbid, "genres": json.loads(genres), "albums": json.loads(albums)}
+
+
+def fetch_artist_metadata(name: str, cache: MetadataCache = None) -> dict:
+    """Fetches artist metadata (MBID, tags/genres and albums) from MusicBrainz.
+    Args:
+        name (str): The artist's name.
+        cache (MetadataCache, optional): If the MBID found is already cached (under another
+                                         name), its details are reused. Defaults to None.
+    Returns:
+        dict: A dict with 'mbid' (None if no match), 'genres' and 'albums'.
+    Raises:
+        musicbrainzngs.WebServiceError: If MusicBrainz cannot be reached.
+    """
+    metadata = {"mbid": None, "genres": [], "albums": []}
+
+    results = musicbrainzngs.search_artists(artist=name, limit=1)
+    if not results["artist-list"]:
+        return metadata
+
+    metadata["mbid"] = results["artist-list"][0]["id"]  # MusicBrainz ID
+
+    cached = cache.get_by_mbid(metadata["mbid"]) if cache else None
+    if cached:
+        return cached
+
+    # Get detailed info: tags (genres), releases (albums)
+    details = musicbrainzngs.get_artist_by_id(
+        metadata["mbid"], includes=["tags", "releases"]
+    )
+
+    # Genres/tags
+    if "tag-list" in details["artist"]:
+        metadata["genres"] = [tag["name"] for tag in details["artist"]["tag-list"]]
+
+    # Albums/releases
+    if "release-list" in details:
+        metadata["albums"] = list({r["title"] for r in details["release-list"]})
+
+    return metadata
+
+
+def enrich_catalog(
+    catalog: list[dict], cache_path, rps: float = MUSICBRAINZ_RPS
+) -> list[dict]:
+    """Fills in genres and albums of every artist in the catalog.
+    Artists are served from the local cache when possible; the rest are looked up in
+    MusicBrainz one at a time: musicbrainzngs sends its requests one after another
+    behind a global lock and rate limit, so concurrent lookups would not be faster.
+    Args:
+        catalog (list[dict]): The catalog, as loaded from catalog.jsonl. Updated in place.
+        cache_path (str | Path): Location of the metadata cache.
+        rps (float, optional): Maximum MusicBrainz requests per second. Defaults to MUSICBRAINZ_RPS.
+    Returns:
+        list[dict]: The enriched catalog.
+    """
+    musicbrainzngs.set_rate_limit(1 / rps, 1)
+    cache = MetadataCache(cache_path)
+
+    missing = []
+    for artist in catalog:
+        metadata = cache.get(artist["name"])
+        if metadata is None:
+            missing.append(artist)
+        else:
+            _apply(artist, metadata)
+
+    log.info(
+        f"Metadata: {len(catalog) - len(missing)} artists cached, {len(missing)} to fetch"
+    )
+
+    for artist in missing:
+        try:
+            metadata = fetch_artist_metadata(artist["name"], cache)
+        except Exception as e:
+            log.error(f"Error fetching data for {artist['name']}: {e}")
+            continue
+        cache.put(artist["name"], metadata)
+        _apply(artist, metadata)
+
+    cache.close()
+    return catalog
+
+
+def _apply(artist: dict, metadata: dict):
+    artist["genres"] = metadata["genres"]
+    artist["albums"] = metadata["albums"]
@@ -0,0 +1,67 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are refilled continuously at `rate` tokens per second, up to `capacity`.
+    Each call to `acquire` consumes one token, blocking until one is available.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens that can be stored (burst size).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Blocks until a token is available and consumes it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """Keeps one TokenBucket per host so every server gets its own politeness budget.
+
+    Args:
+        rps (float): Requests per second allowed for each host.
+        burst (float, optional): Bucket capacity for each host. Defaults to 1.
+    """
+
+    def __init__(self, rps: float, burst: float = 1.0):
+        self.rps = rps
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """Returns the bucket for the host of the given URL, creating it if needed."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rps, self.burst)
+            return self._buckets[host]
+
+    def acquire(self, url: str):
+        """Blocks until a request to the host of `url` is allowed."""
+        self.bucket(url).acquire()
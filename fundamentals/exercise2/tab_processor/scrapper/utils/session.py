@@ -0,0 +1,80 @@
+import threading
+import logging as log
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Configuration ---
+DEFAULT_POOL_SIZE = 10  # Keep-alive connections kept open per host
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # Waits 0.5s, 1s, 2s... between retries
+RETRY_STATUS = (429, 500, 502, 503, 504)
+TIMEOUT = 10
+
+_session = None
+_lock = threading.Lock()
+
+
+def build_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+) -> requests.Session:
+    """Builds a requests Session with a keep-alive connection pool and retry policy.
+    Retries use exponential backoff on 429/5xx responses and honor the Retry-After header.
+    Args:
+        pool_size (int, optional): Maximum number of connections kept per host. Defaults to DEFAULT_POOL_SIZE.
+        retries (int, optional): Number of retries for failed requests. Defaults to DEFAULT_RETRIES.
+        backoff (float, optional): Backoff factor between retries. Defaults to DEFAULT_BACKOFF.
+    Returns:
+        requests.Session: The configured session.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Return the last response so raise_for_status() reports it
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+):
+    """Replaces the shared session with one using the given settings."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = build_session(pool_size, retries, backoff)
+    log.info(
+        f"HTTP session configured (pool_size={pool_size}, retries={retries}, backoff={backoff})"
+    )
+
+
+def get_session() -> requests.Session:
+    """Returns the shared session, creating it with default settings on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Performs a GET request through the shared session."""
+    kwargs.setdefault("timeout", TIMEOUT)
+    return get_session().get(url, **kwargs)
@@ -5,18 +5,27 @@ import utils.beautifulsoup as bs
 from utils import beautifulsoup as bs
 import utils.files as files
 import re
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
 
 
 from utils.data import Song, Artist
+from utils.rate_limit import HostRateLimiter
+from utils.journal import DownloadJournal
+import utils.journal as dl_journal
 from pathlib import Path
+from typing import Iterator
 
 # --- Configuration ---
 ROOT = "https://acordes.lacuerda.net"
 URL_ARTIST_INDEX = "https://acordes.lacuerda.net/tabs/"
 SONG_VERSION = None
 INDEX = "abcdefghijklmnopqrstuvwxyz"
+CATALOG_FILE = "catalog.jsonl"  # One artist (with its songs) per line
+LEGACY_CATALOG_FILE = "catalog.json"
+DEFAULT_RPS = 2.0  # Same politeness budget as the old 0.5 seconds sleep between songs
+PENDING_PER_WORKER = 4  # Songs queued per worker before waiting for downloads to finish
 
 
 # --- Utility Functions ---
@@ -39,11 +48,16 @@ def get_version(song, version: int = 0):
     return song, song_name
 
 
-def get_artists(start_char: str, end_char: str) -> list[Artist]:
+def get_artists(
+    start_char: str, end_char: str, scraped_letters: set[str] = None
+) -> list[Artist]:
     """Scrapes artist URLs for a given range of starting letters.
     Args:
         start_char (str): The starting letter for artists to catalog (e.g., 'a').
         end_char (str): The ending letter for artists to catalog (e.g., 'z').
+        scraped_letters (set[str], optional): If given, the letters whose index page was
+                                              actually read are added to it. Letters whose
+                                              page could not be fetched or parsed are not.
     Returns:
         list[Artist]: A list of Artist objects.
     """
@@ -55,7 +69,7 @@ def get_artists(start_char: str, end_char: str) -> list[Artist]:
         artist_index_url = f"{URL_ARTIST_INDEX}/{char}"
         log.info(f"Scraping artist index: {artist_index_url}")
 
-        soup = bs.get_soup(artist_index_url)
+        soup = bs.get_soup(artist_index_url, parse_only=bs.ONLY_UL)
         if not soup:
             continue
 
@@ -71,82 +85,237 @@ def get_artists(start_char: str, end_char: str) -> list[Artist]:
                 artist_display_name = Path(href).name.replace("_", " ").title()
                 artists.append(Artist(name=artist_display_name, url=href))
 
+        if scraped_letters is not None:
+            scraped_letters.add(char)
+
     return artists
 
 
-def get_catalog(
+def get_artist_songs(
+    artist_name: str, artist_url: str, soup, output_directory: Path
+) -> list[Song]:
+    """Extracts the songs listed on an artist page.
+    Args:
+        artist_name (str): The artist's display name, used to build the lyrics path.
+        artist_url (str): The URL of the artist page.
+        soup (BeautifulSoup): The parsed artist page.
+        output_directory (Path): The base directory where lyrics would eventually be saved.
+    Returns:
+        list[Song]: The songs found on the page.
+    """
+    songs = []
+    for a_tag in soup.select("li > a"):
+        # Filter for valid song links. lacuerda.net song links are relative
+        # to the artist page and do not typically contain '.shtml' in the <a> href itself
+        # for the first part of the relative path, but they *do* eventually form
+        # artist/song.shtml. The original code looked for 'id="r"' which is too specific.
+        # We'll assume any relative href on an artist page is a potential song link.
+        if a_tag and a_tag.get("href") and not a_tag["href"].startswith("http"):
+
+            song_relative_path = a_tag["href"]
+
+            # Construct the full base URL for the song (before adding .shtml or version)
+            # Example: https://acordes.lacuerda.net/artist/song_title
+            # We need to ensure artist_url ends with a '/' if song_relative_path doesn't start with one,
+            # or remove it if song_relative_path starts with one.
+            if not artist_url.endswith("/") and not song_relative_path.startswith("/"):
+                song_base_url_prefix = f"{artist_url}/"
+            else:
+                song_base_url_prefix = artist_url
+
+            url = f"{song_base_url_prefix}{song_relative_path}.shtml"
+            full_song_url, song_filename = get_version(url, SONG_VERSION)
+            song_title = (
+                Path(song_relative_path).stem.replace("_", " ").title()
+            )  # The song title can be derived from the 'stem' of the relative path
+            song_output_dir = f"{output_directory}songs/{artist_name.replace(' ', '_').lower()}/{song_filename}"
+
+            songs.append(
+                Song(
+                    song_title=song_title,
+                    song_url=full_song_url,
+                    genre="",  # Cannot be scraped directly from lacuerda.net
+                    lyrics_path=song_output_dir,
+                )
+            )
+
+    return songs
+
+
+def iter_catalog(
     output_directory: Path,
     start_char: str = "a",
     end_char: str = "z",
-) -> dict:
+) -> Iterator[Artist]:
     """
-    Generates a catalog of artists and their songs from lacuerda.net.
+    Generates a catalog of artists and their songs from lacuerda.net, yielding each
+    artist as soon as its songs are scraped so it can be written out straight away.
     This function does NOT download lyrics, only metadata.
     Args:
         output_directory (Path): The base directory where lyrics would eventually be saved.
                                  Used to construct potential output_path for each song.
         start_char (str): The starting letter for artists to catalog (e.g., 'a').
         end_char (str): The ending letter for artists to catalog (e.g., 'z').
-    Returns:
-        dict: A dictionary with artist names as keys and lists of their Song objects as values.
+    Yields:
+        Artist: Each artist with its Song objects.
     """
     start_char = start_char.lower()
     end_char = end_char.lower()
 
     # Get all artists
-    catalog = get_artists(start_char, end_char)
+    for artist in get_artists(start_char, end_char):
+        log.info(f"Scraping songs for artist: {artist.name} ({artist.url})")
+        soup = bs.get_soup(artist.url, parse_only=bs.ONLY_LI)
+        if soup:
+            artist.songs.extend(
+                get_artist_songs(artist.name, artist.url, soup, output_directory)
+            )
+        yield artist
+
+    log.info("Cataloging complete.")
+
+
+def get_catalog(
+    output_directory: Path,
+    start_char: str = "a",
+    end_char: str = "z",
+) -> list[Artist]:
+    """
+    Generates a catalog of artists and their songs from lacuerda.net (see iter_catalog).
+    Args:
+        output_directory (Path): The base directory where lyrics would eventually be saved.
+        start_char (str): The starting letter for artists to catalog (e.g., 'a').
+        end_char (str): The ending letter for artists to catalog (e.g., 'z').
+    Returns:
+        list[Artist]: The artists with their Song objects.
+    """
+    return list(iter_catalog(output_directory, start_char, end_char))
+
+
+def update_catalog(
+    output_directory: Path,
+    catalog: list[dict],
+    start_char: str = "a",
+    end_char: str = "z",
+) -> tuple[list[dict], dict]:
+    """
+    Incrementally updates an existing catalog instead of rebuilding it.
+    Artist pages are fetched with conditional GETs (see beautifulsoup.fetch_page): artists
+    whose page did not change keep their songs untouched, new or changed artists are
+    rescraped and their songs diffed by URL. Artists outside the letter range are kept as is,
+    and so are those of a letter whose index page could not be read (a failed request must
+    not look like all its artists were removed).
+    Args:
+        output_directory (Path): The base directory where lyrics would eventually be saved.
+        catalog (list[dict]): The existing catalog, as loaded from catalog.jsonl.
+        start_char (str): The starting letter for artists to update (e.g., 'a').
+        end_char (str): The ending letter for artists to update (e.g., 'z').
+    Returns:
+        tuple[list[dict], dict]: The merged catalog and a summary of the changes
+                                 (added/removed artists and songs).
+    """
+    start_char = start_char.lower()
+    end_char = end_char.lower()
+    letters = {chr(c) for c in range(ord(start_char), ord(end_char) + 1)}
+
+    # New objects must not reuse the IDs already present in the catalog
+    Artist.reset_id_counter(max((a.get("id", 0) for a in catalog), default=0) + 1)
+    Song.reset_id_counter(
+        max((s.get("id", 0) for a in catalog for s in a["songs"]), default=0) + 1
+    )
+
+    existing = {artist["url"]: artist for artist in catalog}
+    changes = {
+        "added_artists": [],
+        "removed_artists": [],
+        "added_songs": [],
+        "removed_songs": [],
+    }
+
+    seen = set()
+    scraped_letters = set()
+    for artist in get_artists(start_char, end_char, scraped_letters):
+        seen.add(artist.url)
+        old = existing.get(artist.url)
+
+        try:
+            page = bs.fetch_page(artist.url)
+        except Exception as e:
+            log.error(f"Error fetching {artist.url}: {e}")
+            continue
+
+        if old and page.not_modified:
+            log.info(f"Artist page unchanged, keeping songs: {artist.name}")
+            continue
 
-    for artist in catalog:
         log.info(f"Scraping songs for artist: {artist.name} ({artist.url})")
-        soup = bs.get_soup(artist.url)
-        if not soup:
+        soup = bs.parse(page.text, parse_only=bs.ONLY_LI)
+        songs = get_artist_songs(artist.name, artist.url, soup, output_directory)
+
+        if not old:
+            artist.songs = songs
+            existing[artist.url] = artist.to_dict()
+            changes["added_artists"].append(artist.url)
+            changes["added_songs"].extend(song.song_url for song in songs)
             continue
 
-        for a_tag in soup.select("li > a"):
-            # Filter for valid song links. lacuerda.net song links are relative
-            # to the artist page and do not typically contain '.shtml' in the <a> href itself
-            # for the first part of the relative path, but they *do* eventually form
-            # artist/song.shtml. The original code looked for 'id="r"' which is too specific.
-            # We'll assume any relative href on an artist page is a potential song link.
-            if a_tag and a_tag.get("href") and not a_tag["href"].startswith("http"):
-
-                song_relative_path = a_tag["href"]
-
-                # Construct the full base URL for the song (before adding .shtml or version)
-                # Example: https://acordes.lacuerda.net/artist/song_title
-                # We need to ensure artist_url ends with a '/' if song_relative_path doesn't start with one,
-                # or remove it if song_relative_path starts with one.
-                if not artist.url.endswith("/") and not song_relative_path.startswith(
-                    "/"
-                ):
-                    song_base_url_prefix = f"{artist.url}/"
-                else:
-                    song_base_url_prefix = artist.url
-
-                url = f"{song_base_url_prefix}{song_relative_path}.shtml"
-                full_song_url, song_filename = get_version(url, SONG_VERSION)
-                song_title = (
-                    Path(song_relative_path).stem.replace("_", " ").title()
-                )  # The song title can be derived from the 'stem' of the relative path
-                song_output_dir = f"{output_directory}songs/{artist.name.replace(' ', '_').lower()}/{song_filename}"
-
-                artist.songs.append(
-                    Song(
-                        song_title=song_title,
-                        song_url=full_song_url,
-                        genre="",  # Cannot be scraped directly from lacuerda.net
-                        lyrics_path=song_output_dir,
-                    )
-                )
+        # Keep the entries (and IDs) of songs we already had, add the new ones
+        old_songs = {song["song_url"]: song for song in old["songs"]}
+        new_urls = {song.song_url for song in songs}
+        merged = []
+        for song in songs:
+            if song.song_url in old_songs:
+                merged.append(old_songs[song.song_url])
+            else:
+                merged.append(song.to_dict())
+                changes["added_songs"].append(song.song_url)
+        changes["removed_songs"].extend(url for url in old_songs if url not in new_urls)
+        old["songs"] = merged
+
+    skipped_letters = letters - scraped_letters
+    if skipped_letters:
+        log.warning(
+            "Artist index not read for letters "
+            f"{', '.join(sorted(skipped_letters))}: keeping their artists"
+        )
+
+    # Artists that disappeared from the indexes that were actually read
+    for url, artist in list(existing.items()):
+        if url not in seen and _index_letter(url) in scraped_letters:
+            changes["removed_artists"].append(url)
+            changes["removed_songs"].extend(
+                song["song_url"] for song in artist["songs"]
+            )
+            del existing[url]
+
+    log.info(
+        "Catalog updated: "
+        + ", ".join(f"{len(v)} {k.replace('_', ' ')}" for k, v in changes.items())
+    )
+    return list(existing.values()), changes
 
-    log.info("Cataloging complete.")
-    return catalog
+
+def _index_letter(artist_url: str) -> str:
+    """Returns the artist index letter an artist URL belongs to."""
+    return Path(artist_url).name[:1].lower()
 
 
-def get_song_lyrics(song_name: str, song_url: str, song_file_path: str) -> str:
+def get_song_lyrics(
+    song_name: str,
+    song_url: str,
+    song_file_path: str,
+    limiter: HostRateLimiter = None,
+    journal: DownloadJournal = None,
+    writer: files.BufferedWriter = None,
+) -> str:
     """Fetches the lyrics of a song from its URL.
     Args:
         song_url (str): The URL of the song page.
+        limiter (HostRateLimiter, optional): Rate limiter consulted before hitting the network.
+                                             Defaults to None (no limit).
+        journal (DownloadJournal, optional): Journal where the outcome is recorded. Defaults to None.
+        writer (BufferedWriter, optional): Writer that batches the file writes. Defaults to None
+                                           (each file is written straight away).
     Returns:
         str: The lyrics text, or an empty string if not found.
     """
@@ -156,14 +325,28 @@ def get_song_lyrics(song_name: str, song_url: str, song_file_path: str) -> str:
 
         if files.check_file_exists(song_file_path):
             log.info(f"File {song_file_path} already exists. Skipping download.")
+            if journal:
+                # Downloaded before the journal existed: no need to stat it again
+                journal.record(song_url, dl_journal.DONE)
             return False
 
+        if limiter:
+            limiter.acquire(song_url)
+
         log.info("song --> %s - url --> %s", song_name, song_url)
 
         try:
-            lyric = bs.get_soup(song_url).findAll("pre")
+            # Songs are stored on disk already, so they are kept out of the response cache
+            page = bs.fetch_page(song_url, use_cache=False)
+            lyric = bs.parse(page.text, parse_only=bs.ONLY_PRE).find_all("pre")
         except Exception as e:
             log.error(f"Error fetching song from {song_url}: {e}")
+            if journal:
+                response = getattr(e, "response", None)
+                http_code = response.status_code if response is not None else None
+                journal.record(
+                    song_url, dl_journal.status_for_http_code(http_code), http_code
+                )
             return False
 
         for p in lyric:
@@ -171,20 +354,47 @@ def get_song_lyrics(song_name: str, song_url: str, song_file_path: str) -> str:
             text = re.sub("<.*?>", "", str(p)).strip()
             if text:
 
-                files.write_string_to_file(song_file_path, text=text)
-                print(song_name, "downloaded!")
+                # With a writer, the song is only reported and journaled as done
+                # once its batch is on disk
+                def on_written():
+                    if journal:
+                        journal.record(song_url, dl_journal.DONE, page.status, text)
+                    print(song_name, "downloaded!")
+
+                if writer:
+                    writer.write(song_file_path, text, on_written)
+                else:
+                    files.write_string_to_file(song_file_path, text=text)
+                    on_written()
                 return True
 
+        log.info(f"No lyrics found in {song_url}")
+        if journal:
+            journal.record(song_url, dl_journal.EMPTY, page.status)
+
     except Exception as e:
         log.error(f"Error fetching lyrics from {song_url}: {e}")
         raise e
 
 
-def get_songs(output_directory: str, version: int = 0):
+def get_songs(
+    output_directory: str,
+    version: int = 0,
+    workers: int = 1,
+    rps: float = DEFAULT_RPS,
+    batch_writes: int = 0,
+):
     """Downloads song lyrics from lacuerda.net based on the provided version.
+    Downloads are spread over a pool of `workers` threads, while a per-host token
+    bucket keeps the request rate under `rps`, so request latency overlaps without
+    hammering the server.
     Args:
         output_directory (str): The base directory where lyrics will be saved.
         version (int, optional): The version number of the song to download. Defaults to 0.
+        workers (int, optional): Number of concurrent downloads. Defaults to 1.
+        rps (float, optional): Maximum requests per second for each host. Defaults to DEFAULT_RPS.
+        batch_writes (int, optional): If greater than 0, song files are written in batches of
+                                      this size. Defaults to 0 (no batching).
     """
     # TODO: Refactor this code to use get_catalog and Song/Artist dataclasses.
     # This function currently duplicates a lot of the logic in get_catalog.
@@ -197,58 +407,63 @@ def get_songs(output_directory: str, version: int = 0):
     # 3. For each song, check if the lyrics file already exists
     # 4. If not, fetch the lyrics and save to the appropriate path
 
-    # # -------------------- OLD CODE --------------------#
-    # output_directory = output_directory + "songs/"
-    # for i in INDEX:
-
-    #     artist_index_url = URL_ARTIST_INDEX + "/" + i
-
-    #     lis = bs.get_soup(artist_index_url).find("ul").findAll("li")
-
-    #     artists_urls = []
-    #     for li in lis:
-    #         href = ROOT + li.find("a")["href"]
-    #         if href is not None:
-    #             artists_urls.append(href)
-
-    #     for url in artists_urls:
-    #         artist = str(url).replace(ROOT, "").replace("/", "")
-    #         artist_dir = output_directory + f"/{i}/{artist}"
-    #         log.info("artist--> %s - url --> %s", artist, url)
-
-    #         lis = bs.get_soup(url).findAll("li")
-
-    #         song_urls = []
-
-    #         for li in lis:
-    #             if 'id="r' in str(li):
-    #                 href = url + li.find("a")["href"] + ".shtml"
-    #                 if href is not None:
-    #                     song_urls.append(href)
-
-    #         for song_url in song_urls:
-
-    #             song_url, song_name = get_version(song_url, version)
-    #             song_file_path = f"{artist_dir}/{song_name}"
-
-    #             try:
-    #                 if get_song_lyrics(song_name, song_url, song_file_path):
-    #                     time.sleep(0.5)  # Be polite and avoid hammering the server
-    #                 else:
-    #                     log.info(
-    #                         f"Skipping download for existing file: {song_file_path}"
-    #                     )
-    #                     continue
-    #             except Exception as e:
-    #                 log.error(f"Error fetching song from {song_url}: {e}")
-    #                 continue
-    # # -------------------- OLD CODE --------------------#
-    # -------------------- NEW CODE --------------------#
-    catalog_path = os.path.join(output_directory, "catalog.json")
-    catalog = files.load_from_json(Path(catalog_path))
-
-    for artist in catalog:
-        for song in artist["songs"]:
-            get_song_lyrics(song["song_title"], song["song_url"], song["lyrics_path"])
-            time.sleep(0.5)
-    # ------------------- NEW CODE --------------------#
+    catalog_path = os.path.join(output_directory, CATALOG_FILE)
+    if not files.check_file_exists(catalog_path):
+        log.error(f"No catalog available at {catalog_path}")
+        return
+
+    # Artists are read one line at a time, so downloads start on the first one
+    catalog = files.iter_jsonl(Path(catalog_path))
+
+    # Outcomes of previous runs, loaded in bulk: finished or permanently failed songs are
+    # skipped without touching the disk, transient failures are retried
+    journal = DownloadJournal(os.path.join(output_directory, dl_journal.JOURNAL_FILE))
+    statuses = journal.statuses()
+    skipped = 0
+
+    limiter = HostRateLimiter(rps)
+    max_pending = max(workers, 1) * PENDING_PER_WORKER
+
+    # The writer flushes its last batch on exit, after every download has finished
+    buffered = (
+        files.BufferedWriter(max_files=batch_writes) if batch_writes > 0 else nullcontext()
+    )
+    with buffered as writer, ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        pending = set()
+        for artist in catalog:
+            for song in artist["songs"]:
+                if statuses.get(song["song_url"]) in dl_journal.FINAL_STATUSES:
+                    skipped += 1
+                    continue
+
+                # Keep the queue bounded so a huge catalog does not create every future at once
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _log_download_errors(done)
+
+                pending.add(
+                    executor.submit(
+                        get_song_lyrics,
+                        song["song_title"],
+                        song["song_url"],
+                        song["lyrics_path"],
+                        limiter,
+                        journal,
+                        writer,
+                    )
+                )
+
+        done, _ = wait(pending)
+        _log_download_errors(done)
+
+    log.info(f"Skipped {skipped} songs already in the journal")
+    log.info(f"Download journal: {journal.summary()}")
+    journal.close()
+
+
+def _log_download_errors(futures):
+    """Logs the exception of any failed download so one bad song does not stop the rest."""
+    for future in futures:
+        error = future.exception()
+        if error:
+            log.error(f"Download failed: {error}")
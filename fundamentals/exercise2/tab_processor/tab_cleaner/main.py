@@ -1,120 +1,239 @@
 # Importamos las bibliotecas necesarias
 import os
 import re
+import sys
+import time
+import click
 import logging as log
 import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared modules (common/) live in tab_processor, the parent of this stage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.discovery import iter_files, batched
 from utils.string_mapping import MAPPING
+from utils.rules import RuleEngine, add_stats
+from utils.manifest import (
+    content_hash,
+    load_manifest,
+    save_manifest,
+    stat_entry,
+    is_unchanged,
+    has_output,
+)
 
 # -- Configuration ---
 INPUT_DIRECTORY = "./files/"
 CATALOG_DIRECTORY = f"{INPUT_DIRECTORY}catalogs/"
 LOGS_DIRECTORY = "./logs/"
 
+# Only the scrapper's songs: the other stages also write .txt files under files/
+SONGS_DIRECTORY = f"{INPUT_DIRECTORY}songs/"
 OUTPUT_DIRECTORY = f"{INPUT_DIRECTORY}cleaned/"
+# Next to cleaned/, not inside it: the validator reads every file under cleaned/
+MANIFEST_FILE = f"{INPUT_DIRECTORY}cleaned_manifest.json"
 ROOT = "https://acordes.lacuerda.net"
 URL_ARTIST_INDEX = "https://acordes.lacuerda.net/tabs/"
 MIN_LINES = 5
 SONG_VERSION = 0
 INDEX = "abcdefghijklmnopqrstuvwxyz#"
-
-dir_list = list()
+SHARD_SIZE = 100  # Files handed to a worker at a time
+PROGRESS_EVERY = 5  # Seconds between progress lines
 
 # --- Logging config---
 logger = log.getLogger(__name__)
 
-log.basicConfig(
-    filename=f"{LOGS_DIRECTORY}cleaner.log",
-    filemode="w",
-    encoding="utf-8",
-    format="%(asctime)s %(levelname)-8s %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    level=log.INFO,
-)
+# Only the main process sets up the log file: worker processes started with "spawn"
+# import this file again (as __mp_main__) and would truncate it
+if __name__ == "__main__":
+    log.basicConfig(
+        filename=f"{LOGS_DIRECTORY}cleaner.log",
+        filemode="w",
+        encoding="utf-8",
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        level=log.INFO,
+    )
 
 # --- Logic---
 
-# COMIENZO Función anterior con JSON
-"""
-def list_files_recursive(path="."):
+EMAIL_PATTERN = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
+EMAIL_SENTENCE_PATTERN = r"[\n^.!?]*" + EMAIL_PATTERN + r"[^.!?]*[.!?\n]"
+EMAIL_SENTENCE_REGEX = re.compile(EMAIL_SENTENCE_PATTERN)
 
-    for entry in os.listdir(path):
-        full_path = os.path.join(path, entry)
-        if os.path.isdir(full_path):
-            list_files_recursive(full_path)
-        else:
-            dir_list.append(full_path)
-
-    return dir_list
-"""
-# FIN Función anterior con JSON
-
-# COMIENZO Función nueva sin JSON
-def list_files_recursive(path="."):
-    for entry in os.listdir(path):
-        full_path = os.path.join(path, entry)
-        if os.path.isdir(full_path):
-            list_files_recursive(full_path)
-        else:
-            # Solo añadimos archivos .txt
-            if full_path.lower().endswith(".txt"):
-                dir_list.append(full_path)
-    return dir_list
-# FIN Función nueva sin JSON
+# All rules compiled once: email sentences first, then MAPPING in order.
+# Flags stay at 0: the old call used re.DOTALL & re.IGNORECASE, which evaluates to 0,
+# and changing them would change the cleaned output.
+RULES = RuleEngine([(EMAIL_SENTENCE_PATTERN, "")] + list(MAPPING.items()), flags=0)
+RULES_FINGERPRINT = RULES.fingerprint(MIN_LINES)
 
-def remove_email_sentences(text: str):
+# clean_file outcomes
+CLEANED = "cleaned"
+SKIPPED = "skipped"
+UNCHANGED = "unchanged"
 
-    email_pattern = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-    sentence_pattern = r"[\n^.!?]*" + email_pattern + r"[^.!?]*[.!?\n]"
 
-    return re.sub(sentence_pattern, "", text)
+def remove_email_sentences(text: str):
 
+    return EMAIL_SENTENCE_REGEX.sub("", text)
 
-def apply_format_rules(text: str):
-    formatted_text = str
 
-    formatted_text = remove_email_sentences(text)
+def apply_format_rules(text: str):
 
-    for key, value in MAPPING.items():
-        formatted_text = re.sub(
-            key, value, formatted_text, flags=re.DOTALL & re.IGNORECASE
-        )
-    return formatted_text
+    return RULES.apply(text)
 
 
-def main():
+def log_rule_stats(engine: RuleEngine, stats: dict[str, dict]):
+    """Logs how many times each rule matched and the time spent on it."""
+    log.info(
+        f"Rules: {len(engine.rules)}, full passes per file (at most): {engine.passes()}"
+    )
+    for name, values in stats.items():
+        log.info(f"Rule {name!r}: {values['hits']} hits, {values['seconds']:.3f}s")
+
+
+def clean_file(file_path: str, known: dict = None) -> tuple[str, dict]:
+    """Cleans one tab and writes it under OUTPUT_DIRECTORY.
+    Nothing is written if the content hash equals the one of `known` (its manifest
+    entry, only given if its cleaned file still exists).
+    Returns the outcome (CLEANED, SKIPPED or UNCHANGED) and the manifest entry."""
+    log.info(f"Processing files... -> {file_path}")
+    entry = stat_entry(file_path)
+    text = str()
+    with open(file_path, "r") as file:
+        text = file.read()
+    entry["hash"] = content_hash(text)
+
+    if known and entry["hash"] == known["hash"]:
+        log.info("Same content as the last run. Skipping.")
+        entry["output"] = known["output"]
+        return UNCHANGED, entry
+    if text.count("\n") < MIN_LINES:
+        log.info("Empty or too small tab. Skipping.............................")
+        entry["output"] = None
+        return SKIPPED, entry
+    # Formatting of the text goes in that function call
+
+    formatted_text = apply_format_rules(text)
+
+    output_file = file_path.replace(INPUT_DIRECTORY, OUTPUT_DIRECTORY)
+    dir = "/".join(output_file.split("/")[:-1])
+
+    # Creates the path if not exists
+    if not os.path.exists(dir):
+        os.makedirs(dir, exist_ok=True)
+        log.info(f"{dir} CREATED")
+
+    with open(output_file, "w") as file:
+        file.write(formatted_text)
+    entry["output"] = output_file
+    return CLEANED, entry
+
+
+def clean_shard(items: list[tuple[str, dict]]) -> tuple[dict, dict, dict]:
+    """Cleans a group of (file path, known manifest entry) items. Runs in a worker process when
+    --workers > 1. Returns the count of each outcome, the manifest entries of the files
+    and the shard's rule statistics."""
+    RULES.reset_stats()
+    counts = {CLEANED: 0, SKIPPED: 0, UNCHANGED: 0}
+    entries = {}
+    for file_path, known in items:
+        outcome, entries[file_path] = clean_file(file_path, known)
+        counts[outcome] += 1
+    return counts, entries, RULES.stats()
+
+
+def init_worker():
+    # Per-file log lines from several processes would interleave in the same file;
+    # workers only report totals back to the main process
+    log.disable(log.INFO)
+
+
+@click.command()
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes cleaning files in parallel.",
+)
+@click.option(
+    "--force",
+    "-f",
+    is_flag=True,
+    default=False,
+    help="Clean every file again, even if it did not change since the last run.",
+)
+def main(workers, force):
 
     # Start time tracking
     start_time = datetime.datetime.now()
     log.info(f"Cleaner started at {start_time}")
     print("Starting cleaner...")
 
-    cleaned = 0
-
-    for file_path in list_files_recursive(INPUT_DIRECTORY):
-        log.info(f"Processing files... -> {file_path}")
-        text = str()
-        with open(file_path, "r") as file:
-            text = file.read()
-        if text.count("\n") < MIN_LINES:
-            log.info("Empty or too small tab. Skipping.............................")
-            continue
-        # Formatting of the text goes in that function call
-
-        formatted_text = apply_format_rules(text)
-
-        output_file = file_path.replace(INPUT_DIRECTORY, OUTPUT_DIRECTORY)
-        dir = "/".join(output_file.split("/")[:-1])
-        file_name = output_file.split("/")[-1:]
-
-        # Creates the path if not exists
-        if not os.path.exists(dir):
-            os.makedirs(dir, exist_ok=True)
-            print("INFO", dir, " CREATED!!")
-
-        cleaned += 1
-        with open(output_file, "w") as file:
-            file.write(formatted_text)
-            print(cleaned, "--", file_name, " CREATED!!")
+    # Manifest of the last run. Ignored if the rules changed or the output was deleted
+    manifest = {}
+    if not force and os.path.isdir(OUTPUT_DIRECTORY):
+        manifest = load_manifest(MANIFEST_FILE, RULES_FINGERPRINT)
+    if not manifest:
+        log.info("No usable manifest (first run, new rules or --force): cleaning all")
+
+    # Files with the same mtime and size as last time are skipped without being read,
+    # as long as their cleaned file was not lost since (else the entry is not used)
+    files = list(iter_files(SONGS_DIRECTORY, suffixes=(".txt",)))
+    entries = {}
+    todo = []
+    for file_path in files:
+        entry = manifest.get(file_path)
+        if not has_output(entry):
+            todo.append((file_path, None))
+        elif is_unchanged(entry, stat_entry(file_path)):
+            entries[file_path] = entry
+        else:
+            todo.append((file_path, entry))
+
+    unchanged = len(files) - len(todo)
+    shards = list(batched(todo, SHARD_SIZE))
+    log.info(
+        f"{len(files)} files, {unchanged} unchanged, {len(todo)} to check"
+        f" in {len(shards)} shards, {workers} workers"
+    )
+
+    cleaned = skipped = 0
+    rule_stats = {}
+    last_progress = time.monotonic()
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, initializer=init_worker)
+    # Results come back in shard order, so progress is reported in order too
+    results = (executor.map if executor else map)(clean_shard, shards)
+    try:
+        for shard_counts, shard_entries, shard_stats in results:
+            cleaned += shard_counts[CLEANED]
+            skipped += shard_counts[SKIPPED]
+            unchanged += shard_counts[UNCHANGED]
+            entries.update(shard_entries)
+            add_stats(rule_stats, shard_stats)
+
+            if time.monotonic() - last_progress >= PROGRESS_EVERY:
+                last_progress = time.monotonic()
+                print(
+                    f"Progress: {cleaned + skipped + unchanged}/{len(files)} files",
+                    f"-- cleaned = {cleaned}, skipped = {skipped},",
+                    f"unchanged = {unchanged}",
+                )
+    finally:
+        if executor:
+            executor.shutdown()
+        # Saved even after a failure, so finished files are not processed again
+        save_manifest(MANIFEST_FILE, RULES_FINGERPRINT, entries)
+
+    summary = f"Cleaned = {cleaned}, skipped = {skipped}, unchanged = {unchanged}"
+    print(summary)
+    log.info(summary)
+    log_rule_stats(RULES, rule_stats)
 
     end_time = datetime.datetime.now()
     log.info(f"Cleaner ended at {end_time}")
@@ -0,0 +1,61 @@
+"""Manifest of the files processed by the cleaner.
+For every source tab it stores the mtime, size and content hash seen on the last run,
+and the cleaned file written for it ("output", null if the tab was skipped), plus the
+fingerprint of the rule set used. A file only needs cleaning again if it is new, if it
+changed, if the rules changed, or if its cleaned file is gone."""
+
+import os
+import json
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path: str, rules_fingerprint: str) -> dict:
+    """Loads the manifest entries (source path -> entry).
+    Returns an empty dict if the manifest does not exist, cannot be read, or was
+    written with a different rule set (so every file is processed again)."""
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if manifest.get("rules") != rules_fingerprint:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path: str, rules_fingerprint: str, entries: dict):
+    """Writes the manifest atomically (temporary file + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"rules": rules_fingerprint, "files": entries}, file)
+    os.replace(tmp_path, path)
+
+
+def stat_entry(file_path: str) -> dict:
+    """The mtime and size of a file, as stored in the manifest."""
+    stat = os.stat(file_path)
+    return {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def is_unchanged(entry: dict | None, stat: dict) -> bool:
+    """True if the file has the same mtime and size as when it was processed."""
+    return (
+        entry is not None
+        and entry["mtime"] == stat["mtime"]
+        and entry["size"] == stat["size"]
+    )
+
+
+def has_output(entry: dict | None) -> bool:
+    """True if the cleaned file recorded in the entry still exists, or if the tab was
+    skipped (so there is none). Entries written before outputs were recorded do not
+    count, as it is not known whether they had one."""
+    if entry is None or "output" not in entry:
+        return False
+    return entry["output"] is None or os.path.isfile(entry["output"])
@@ -1,10 +1,22 @@
 # Importamos las bibliotecas necesarias
 import os
+import sys
+import time
+import heapq
 import click
-import re
 import logging as log
 import datetime
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Shared modules (common/) live in tab_processor, the parent of this stage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.discovery import iter_files, batched
+from common.validations import ManifestWriter, MANIFEST_FILE, OK, KO
+from utils.validation import failing_rule, time_limit, ValidationTimeout, TIMEOUT_RULE
+from utils.output import materialize, MODES, COPY, NONE
 
 ## CHANGED: use cleaned/ok/ko directories built with os.path.join
 INPUT_DIRECTORY = "./files/"
@@ -12,11 +24,16 @@ CLEANED_DIRECTORY = os.path.join(INPUT_DIRECTORY, "cleaned")
 OUTPUT_DIRECTORY_OK = os.path.join(INPUT_DIRECTORY, "validations", "ok")
 OUTPUT_DIRECTORY_KO = os.path.join(INPUT_DIRECTORY, "validations", "ko")
 ## END CHANGE
+LOGS_DIRECTORY = "./logs/"
 
 ROOT = "https://acordes.lacuerda.net"
 URL_ARTIST_INDEX = "https://acordes.lacuerda.net/tabs/"
 SONG_VERSION = 0
 INDEX = "abcdefghijklmnopqrstuvwxyz#"
+VALIDATION_TIMEOUT = 5.0  # Seconds allowed to validate one song before it goes to KO
+SHARD_SIZE = 100  # Files handed to a worker at a time
+PROGRESS_EVERY = 5  # Seconds between progress lines
+SLOWEST = 10  # Slowest songs listed in the log
 
 # (these globals are no longer really needed, but kept to avoid touching more code)
 dir_list = list()
@@ -24,49 +41,63 @@ output_file = str()
 dir = str()
 file_name = str()
 
+# Only the main process sets up the log file: worker processes started with "spawn"
+# import this file again (as __mp_main__) and would truncate it
+if __name__ == "__main__":
+    log.basicConfig(
+        filename=f"{LOGS_DIRECTORY}validator.log",
+        filemode="w",
+        encoding="utf-8",
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        level=log.INFO,
+    )
 
-def validate_song_format(song):
-    """Validates if the song follows a basic expected format + extra chord rule."""
-    # Basic regex pattern for song format (original rule)
-    pattern = r"((?:[A-Z]+\s+)*\n.+)+"
 
-    # Check if the song matches the basic pattern
-    match = re.fullmatch(pattern, song, flags=re.DOTALL)
-    if not match:
-        return False
+def validate_file(file_path: str, mode: str, timeout: float) -> dict:
+    """Validates one cleaned song and places it in OUTPUT_DIRECTORY_OK or _KO.
+    Returns its manifest entry (see common/validations.py)."""
+    text = str()
+    with open(file_path, "r") as file:
+        text = file.read()
 
-    # EXTRA RULE: the song must contain at least one chord-only line
-    if not has_chord_line(song):
-        return False
+    # Formatting of the text goes in that function call
+    start = time.perf_counter()
+    try:
+        with time_limit(timeout):
+            rule = failing_rule(text)
+    except ValidationTimeout as e:
+        log.warning(f"{file_path}: {e}, sent to KO")
+        rule = TIMEOUT_RULE
+    micros = round((time.perf_counter() - start) * 1_000_000)
 
-    return True
-    
-def has_chord_line(song: str) -> bool:
-    """Checks if the song contains at least one chord-only line (extra validation rule)."""
-    chord_pattern = re.compile(
-        r'^([A-G][#b]?(m|maj7|m7|7|sus2|sus4|dim|aug)?)(\s+[A-G][#b]?(m|maj7|m7|7|sus2|sus4|dim|aug)?)*$'
-    )
+    ## CHANGED: compute relative path from CLEANED_DIRECTORY
+    rel_path = os.path.relpath(file_path, CLEANED_DIRECTORY)
+    ## END CHANGE
 
-    for line in song.splitlines():
-        stripped = line.strip()
-        if not stripped:
-            continue
-        if chord_pattern.match(stripped):
-            return True
+    status = OK if rule is None else KO
+    base_dir = OUTPUT_DIRECTORY_OK if rule is None else OUTPUT_DIRECTORY_KO
 
-    return False
+    if mode != NONE:
+        ## CHANGED: build output path using base_dir + relative path
+        output_file = os.path.join(base_dir, rel_path)
+        ## END CHANGE
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        materialize(file_path, output_file, text, mode)
 
+    return {
+        "file": rel_path,
+        "source": file_path,
+        "status": status,
+        "rule": rule,
+        "lines": len(text.splitlines()),
+        "micros": micros,
+    }
 
 
-## CHANGED: safer recursive file listing using os.walk, no global state
-def list_files_recursive(path: str):
-    """Lists all files in a directory recursively (safer version using os.walk)."""
-    files = []
-    for root, _, filenames in os.walk(path):
-        for name in filenames:
-            files.append(os.path.join(root, name))
-    return files
-## END CHANGE
+def validate_shard(file_paths: list[str], mode: str, timeout: float) -> list[dict]:
+    """Validates a group of files. Runs in a worker process when --workers > 1."""
+    return [validate_file(file_path, mode, timeout) for file_path in file_paths]
 
 
 @click.command()
@@ -79,7 +110,35 @@ def list_files_recursive(path: str):
         "If flag is present, drops all files and validates from the clean directory. "
     ),
 )
-def main(init):
+@click.option(
+    "--timeout",
+    "-t",
+    type=float,
+    default=VALIDATION_TIMEOUT,
+    show_default=True,
+    help="Seconds allowed to validate one song; slower songs go to KO. 0 disables it.",
+)
+@click.option(
+    "--mode",
+    "-m",
+    type=click.Choice(MODES),
+    default=COPY,
+    show_default=True,
+    help=(
+        "How songs are placed in validations/ok and ko: copied, hard or symbolic "
+        "links to the cleaned files, or not at all (only the manifest is written). "
+        "A hard link is the same file as the cleaned one: editing either changes "
+        "both, and the cleaner rewrites its files in place."
+    ),
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes validating files in parallel.",
+)
+def main(init, timeout, mode, workers):
     # Start time tracking
     start_time = datetime.datetime.now()
     log.info(f"Validator started at {start_time}")
@@ -92,47 +151,43 @@ def main(init):
             shutil.rmtree(OUTPUT_DIRECTORY_KO)
         log.info("Directories Removed")
 
-    OK = 0
-    KO = 0
-
-    for file_path in list_files_recursive(CLEANED_DIRECTORY):
-
-        text = str()
-        with open(file_path, "r") as file:
-            text = file.read()
+    oks = kos = 0
+    slowest = []
 
-        # Formatting of the text goes in that function call
-        validated = validate_song_format(text)
+    last_progress = time.monotonic()
 
-        ## CHANGED: compute relative path from CLEANED_DIRECTORY
-        rel_path = os.path.relpath(file_path, CLEANED_DIRECTORY)
-        ## END CHANGE
-
-        if validated:
-            base_dir = OUTPUT_DIRECTORY_OK
-            OK += 1
-        else:
-            base_dir = OUTPUT_DIRECTORY_KO
-            KO += 1
-
-        ## CHANGED: build output path using base_dir + relative path
-        output_file = os.path.join(base_dir, rel_path)
-        ## END CHANGE
-
-        ## CHANGED: create parent directory using os.path.dirname
-        out_dir = os.path.dirname(output_file)
-        if not os.path.exists(out_dir):
-            os.makedirs(out_dir, exist_ok=True)
-            print("OKs =", OK, "-- KOs =", KO, "--", out_dir, "CREATED!!")
-        ## END CHANGE
-
-        with open(output_file, "w") as file:
-            file.write(text)
-            ## CHANGED: print only the file name using os.path.basename
-            print("OKs =", OK, "-- KOs =", KO, "--", os.path.basename(output_file), "CREATED!!")
-            ## END CHANGE
-
-    log.info(f"OKs = {OK}, -- KOs = {KO}, --")
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    shards = batched(iter_files(CLEANED_DIRECTORY), SHARD_SIZE)
+    # Results come back in shard order, so the manifest is in discovery order
+    results = (executor.map if executor else map)(
+        partial(validate_shard, mode=mode, timeout=timeout), shards
+    )
+    try:
+        # Verdicts are always recorded in the manifest, whatever the output mode
+        with ManifestWriter(MANIFEST_FILE) as manifest:
+            for entries in results:
+                for entry in entries:
+                    manifest.write(entry)
+                    if entry["status"] == OK:
+                        oks += 1
+                    else:
+                        kos += 1
+                slowest = heapq.nlargest(
+                    SLOWEST, slowest + entries, key=lambda entry: entry["micros"]
+                )
+
+                if time.monotonic() - last_progress >= PROGRESS_EVERY:
+                    last_progress = time.monotonic()
+                    print(f"Progress: OKs = {oks} -- KOs = {kos}")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    print(f"OKs = {oks} -- KOs = {kos}")
+    log.info(f"Verdicts saved in {MANIFEST_FILE}")
+    for entry in slowest:
+        log.info(f"Slow: {entry['micros']} us, {entry['lines']} lines, {entry['source']}")
+    log.info(f"OKs = {oks}, -- KOs = {kos}, --")
     end_time = datetime.datetime.now()
     log.info(f"Validator ended at {end_time}")
     duration = end_time - start_time
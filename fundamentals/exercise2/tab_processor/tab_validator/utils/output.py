@@ -0,0 +1,52 @@
+"""How the validated songs are placed in validations/ok and validations/ko.
+
+COPY writes the song again (the original behaviour), HARDLINK and SYMLINK only add a
+directory entry pointing to the cleaned file, and NONE writes nothing: the verdicts are
+only recorded in the validations manifest (see common/validations.py).
+
+A hard link is the same inode as the cleaned file, not a snapshot of it: a later stage
+editing the output in place edits files/cleaned too, and the cleaner rewriting a song in
+place (it does not write a temporary file and replace it) changes the validated copy,
+whatever its new verdict. That is why COPY stays the default.
+"""
+
+import os
+
+COPY = "copy"
+HARDLINK = "hardlink"
+SYMLINK = "symlink"
+NONE = "none"
+MODES = (COPY, HARDLINK, SYMLINK, NONE)
+
+
+def materialize(source: str, output_file: str, text: str, mode: str = COPY):
+    """Places a validated song at `output_file`.
+    Args:
+        source (str): The cleaned file that was validated.
+        output_file (str): Destination inside validations/ok or validations/ko.
+        text (str): The song, already read (written as is in COPY mode).
+        mode (str, optional): One of MODES. Defaults to COPY.
+    """
+    if mode == NONE:
+        return
+
+    # Links cannot replace an existing entry, and writing over a link left by a
+    # previous run would change the cleaned file itself
+    if os.path.lexists(output_file):
+        os.remove(output_file)
+
+    if mode == HARDLINK:
+        try:
+            os.link(source, output_file)
+            return
+        except OSError:
+            # Different file system, or links not supported: fall back to a copy
+            pass
+    elif mode == SYMLINK:
+        os.symlink(
+            os.path.relpath(source, os.path.dirname(output_file)), output_file
+        )
+        return
+
+    with open(output_file, "w") as file:
+        file.write(text)
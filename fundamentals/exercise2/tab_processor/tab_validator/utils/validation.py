@@ -0,0 +1,75 @@
+"""Format checks applied by the validator.
+
+The original rule was re.fullmatch(r"((?:[A-Z]+\\s+)*\\n.+)+", song, flags=re.DOTALL).
+With DOTALL the trailing ".+" accepts anything, so one repetition of the group is
+enough and the rule is equivalent to: the song starts with a block made only of
+uppercase letters and whitespace that ends in whitespace (or with nothing at all),
+followed by a newline and at least one more character. SONG_PREFIX checks exactly that
+with a single forward scan that stops at the first valid newline or at the first
+character that cannot be part of the block, so it never looks past the song's header
+and cannot backtrack more than once per character.
+"""
+
+import re
+import signal
+import threading
+from contextlib import contextmanager
+from common.chords import has_chord_line
+
+# A newline right at the start, or [A-Z] + [A-Z or whitespace]... + whitespace + newline,
+# then at least one character
+SONG_PREFIX = re.compile(r"\n.|[A-Z][A-Z\s]*?\s\n.", re.DOTALL)
+
+
+# Names of the rules, as reported for the songs that fail them
+FORMAT_RULE = "format"
+CHORD_LINE_RULE = "chord_line"
+TIMEOUT_RULE = "timeout"
+
+
+def failing_rule(song: str) -> str | None:
+    """Returns the name of the first rule the song fails, or None if it is valid."""
+    # Basic format (original rule, see the module docstring)
+    if not SONG_PREFIX.match(song):
+        return FORMAT_RULE
+
+    # EXTRA RULE: the song must contain at least one chord-only line (common/chords.py)
+    if not has_chord_line(song):
+        return CHORD_LINE_RULE
+
+    return None
+
+
+def validate_song_format(song: str) -> bool:
+    """Validates if the song follows a basic expected format + extra chord rule."""
+    return failing_rule(song) is None
+
+
+class ValidationTimeout(Exception):
+    """Raised when validating a single song takes longer than allowed."""
+
+
+@contextmanager
+def time_limit(seconds: float):
+    """Raises ValidationTimeout if the block runs for more than `seconds`.
+    Uses SIGALRM, so it only works in the main thread on Unix; elsewhere, or with
+    seconds <= 0, the block runs without a limit. The regex engine checks for signals
+    while it runs, so even a long match is interrupted."""
+    if (
+        seconds <= 0
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise ValidationTimeout(f"validation took more than {seconds} seconds")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)